@@ -1,6 +1,7 @@
 import requests
 import time
 import psycopg2
+from datetime import datetime
 from unidecode import unidecode
 
 # --- 1. KONFIGURACJA BAZY DANYCH ---
@@ -79,7 +80,7 @@ class WykopScraperToDB:
         except:
             return []
 
-    def save_post(self, wykop_id, tag_id, content):
+    def save_post(self, wykop_id, tag_id, content, timestamp):
         """
         Zapisuje post do tabeli post_wykop.
         POPRAWKA: Jawnie podajemy ID wpisu z Wykopu do kolumny 'id'.
@@ -88,10 +89,11 @@ class WykopScraperToDB:
         # Jeśli Twoja baza nie ma klucza głównego na ID, zadziała zwykły INSERT,
         # ale dodajemy obsługę błędów DuplicateKey.
 
-        sql = "INSERT INTO post_wykop (id, tag_id, post) VALUES (%s, %s, %s)"
+        # timestamp jest potrzebny triggerowi trigger_sentiment_daily - bez niego wpis nie trafi do dziennych agregatów
+        sql = "INSERT INTO post_wykop (id, tag_id, post, timestamp) VALUES (%s, %s, %s, %s)"
 
         try:
-            self.cursor.execute(sql, (wykop_id, tag_id, content))
+            self.cursor.execute(sql, (wykop_id, tag_id, content, timestamp))
             self.conn.commit()
             return True
         except psycopg2.IntegrityError:
@@ -116,6 +118,7 @@ class WykopScraperToDB:
             page = 1
             max_empty_pages = 3
             empty_pages_cnt = 0
+            timestamp_pobrania = datetime.now()
 
             while posts_collected < TARGET_POSTS_PER_TAG:
                 entries = self.get_tag_stream(db_tag_name, page)
@@ -140,7 +143,7 @@ class WykopScraperToDB:
 
                     # Sprawdzamy czy mamy ID i Treść
                     if wykop_id and content:
-                        success = self.save_post(wykop_id, db_tag_id, content)
+                        success = self.save_post(wykop_id, db_tag_id, content, timestamp_pobrania)
                         if success:
                             posts_collected += 1
 
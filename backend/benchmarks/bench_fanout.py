@@ -0,0 +1,59 @@
+"""
+Porownuje opoznienie /scores, /scores/{code} i /charts/history/{code} przy sekwencyjnym
+(QUERY_FANOUT=1) i rownoleglym wykonaniu zapytan do zrodel. Laczy sie z baza skonfigurowana w main.py.
+
+    cd backend
+    python benchmarks/bench_fanout.py --runs 50 --code F --fanout 5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from stats import percentile
+
+
+async def measure(label, make_call, runs):
+    await make_call()  # rozgrzewka puli polaczen
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await make_call()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    print(f"{label:<45} p50={percentile(samples, 50):8.1f} ms  "
+          f"p95={percentile(samples, 95):8.1f} ms  mean={statistics.mean(samples):8.1f} ms")
+    return samples
+
+
+async def run(args):
+    cases = {
+        "compute_combined_scores": lambda: main.compute_combined_scores(),
+        f"compute_combined_score_by_code({args.code})": lambda: main.compute_combined_score_by_code(args.code),
+        # Parametry z Query(...) trzeba podac jawnie - przy wywolaniu poza FastAPI domyslna wartoscia jest obiekt Query
+        f"get_history_charts({args.code}, {args.days})": lambda: main.get_history_charts(
+            args.code, args.days, resolution="day", max_points=None
+        ),
+    }
+
+    for fanout in (1, args.fanout):
+        main.QUERY_FANOUT = fanout
+        print(f"\n--- QUERY_FANOUT={fanout} ---")
+        for label, make_call in cases.items():
+            await measure(label, make_call, args.runs)
+
+    await main.engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--code", default="F")
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--fanout", type=int, default=main.QUERY_FANOUT)
+    asyncio.run(run(parser.parse_args()))
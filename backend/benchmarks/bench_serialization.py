@@ -0,0 +1,59 @@
+"""
+Porownuje zwykla sciezke i szybka sciezke (?fast=true) list endpointow na dzialajacym API:
+czas odpowiedzi (p50/p95) i rozmiar odpowiedzi. Kazde zapytanie ma unikalny parametr _bench,
+zeby nie trafiac w cache odpowiedzi.
+
+    cd backend
+    python benchmarks/bench_serialization.py --url http://127.0.0.1:8000 --runs 20 --code F
+"""
+import argparse
+import time
+import urllib.request
+
+from stats import percentile
+
+
+def endpoints(code):
+    return [
+        f"/markets/sectors/{code}",
+        "/ceidg/scores",
+        "/komentarz_youtube?limit=5000",
+        f"/komentarz_youtube/{code}?limit=5000",
+        "/post_wykop?limit=5000",
+        f"/post_wykop/{code}?limit=5000",
+    ]
+
+
+def fetch(url):
+    start = time.perf_counter()
+    with urllib.request.urlopen(url) as response:
+        body = response.read()
+    return (time.perf_counter() - start) * 1000, len(body)
+
+
+def measure(base_url, path, fast, runs):
+    separator = "&" if "?" in path else "?"
+    samples, size = [], 0
+    for i in range(runs):
+        url = f"{base_url}{path}{separator}fast={'true' if fast else 'false'}&_bench={time.time_ns()}{i}"
+        elapsed, size = fetch(url)
+        samples.append(elapsed)
+    return percentile(samples, 50), percentile(samples, 95), size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--code", default="F")
+    args = parser.parse_args()
+
+    print(f"{'endpoint':<40} {'sciezka':<8} {'p50 ms':>9} {'p95 ms':>9} {'bajty':>10}")
+    for path in endpoints(args.code):
+        for fast in (False, True):
+            p50, p95, size = measure(args.url, path, fast, args.runs)
+            print(f"{path:<40} {'fast' if fast else 'orm':<8} {p50:9.1f} {p95:9.1f} {size:10d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Obciaza kazdy endpoint GET dzialajacego API przy zadanych poziomach wspolbieznosci i zapisuje
+przepustowosc oraz opoznienia p50/p95/p99 do pliku JSON. Liste tras pobiera z /openapi.json,
+wiec nowe endpointy z main.py sa mierzone automatycznie. --compare porownuje wynik z
+wczesniejszym plikiem i konczy sie kodem 1, jesli ktoras trasa jest wolniejsza o wiecej niz --tolerance.
+
+    cd backend
+    python benchmarks/loadtest.py --url http://127.0.0.1:8000 --concurrency 1,8,32 --requests 200 \\
+        --output bench_results.json --compare bench_baseline.json
+"""
+import argparse
+import json
+import platform
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from stats import percentile
+
+# Trasy pomijane: administracyjne, eksporty calych tabel i strumien SSE (nie konczy sie)
+SKIPPED_PREFIXES = ("/admin", "/metrics", "/export", "/scores/stream")
+
+# Wymagane parametry - bez nich trasa zwracalaby same 422
+REQUIRED_QUERIES = {
+    "/search/comments": "q=budowa",
+}
+
+# Dodatkowe warianty zapytan mierzone obok domyslnych
+EXTRA_QUERIES = {
+    "/search/comments": ["source=youtube", "sections={section_code}"],
+    "/komentarz_youtube": ["limit=1000", "limit=1000&fast=true"],
+    "/post_wykop": ["limit=1000", "limit=1000&fast=true"],
+    "/komentarz_youtube/{section_code}": ["limit=1000"],
+    "/post_wykop/{section_code}": ["limit=1000"],
+    "/markets/sectors/{section_code}": ["fast=true"],
+    "/charts/history/{section_code}": ["days=365"],
+}
+
+
+def discover_routes(base_url, code):
+    with urllib.request.urlopen(f"{base_url}/openapi.json") as response:
+        spec = json.load(response)
+
+    targets = []
+    for template, operations in sorted(spec["paths"].items()):
+        if "get" not in operations or template.startswith(SKIPPED_PREFIXES):
+            continue
+        path = template.replace("{section_code}", code)
+        required = REQUIRED_QUERIES.get(template)
+        if required:
+            template, path = f"{template}?{required}", f"{path}?{required}"
+        targets.append((template, path))
+        separator = "&" if required else "?"
+        for query in EXTRA_QUERIES.get(template.split("?")[0], []):
+            query = query.replace("{section_code}", code)
+            targets.append((f"{template}{separator}{query}", f"{path}{separator}{query}"))
+    return targets
+
+
+def fetch(url):
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=60) as response:
+            response.read()
+            ok = response.status < 400
+    except urllib.error.HTTPError as e:
+        # 404 dla pustej sekcji to poprawna odpowiedz API, nie blad obciazenia
+        ok = e.code == 404
+    except Exception:
+        ok = False
+    return (time.perf_counter() - start) * 1000, ok
+
+
+def run_level(base_url, path, concurrency, total, bust_cache):
+    separator = "&" if "?" in path else "?"
+    urls = [
+        f"{base_url}{path}{separator}_bench={i}" if bust_cache else f"{base_url}{path}"
+        for i in range(total)
+    ]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(fetch, urls))
+    wall = time.perf_counter() - start
+
+    latencies = [elapsed for elapsed, _ in results]
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": sum(1 for _, ok in results if not ok),
+        "throughput_rps": round(total / wall, 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(sum(latencies) / len(latencies), 2),
+    }
+
+
+def compare(results, baseline_path, tolerance):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["route"], r["concurrency"]): r for r in json.load(f)["results"]}
+
+    regressions = []
+    for r in results:
+        old = baseline.get((r["route"], r["concurrency"]))
+        if old and old["p95_ms"] > 0 and r["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{r['route']} @ {r['concurrency']}: p95 {old['p95_ms']} -> {r['p95_ms']} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark obciazeniowy API")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--code", default="F", help="sekcja PKD podstawiana za {section_code}")
+    parser.add_argument("--concurrency", default="1,8,32", help="poziomy wspolbieznosci, np. 1,8,32")
+    parser.add_argument("--requests", type=int, default=200, help="liczba zapytan na trase i poziom")
+    parser.add_argument("--routes", default="", help="mierz tylko trasy zawierajace ten tekst")
+    parser.add_argument("--bust-cache", action="store_true", help="unikalny parametr w kazdym zapytaniu (omija cache odpowiedzi)")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="plik z poprzednim wynikiem do porownania")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="dopuszczalny wzrost p95 (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    levels = [int(c) for c in args.concurrency.split(",")]
+    targets = [t for t in discover_routes(args.url, args.code) if args.routes in t[0]]
+
+    results = []
+    for route, path in targets:
+        for concurrency in levels:
+            fetch(f"{args.url}{path}")  # rozgrzewka
+            result = {"route": route, **run_level(args.url, path, concurrency, args.requests, args.bust_cache)}
+            results.append(result)
+            print(f"{route:<55} c={concurrency:<3} {result['throughput_rps']:>9.1f} rps  "
+                  f"p50={result['p50_ms']:>8.1f}  p95={result['p95_ms']:>8.1f}  p99={result['p99_ms']:>8.1f}  "
+                  f"err={result['errors']}")
+
+    report = {
+        "meta": {
+            "url": args.url,
+            "section_code": args.code,
+            "requests_per_level": args.requests,
+            "concurrency": levels,
+            "bust_cache": args.bust_cache,
+            "python": platform.python_version(),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Zapisano {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        for line in regressions:
+            print(f"REGRESJA: {line}")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
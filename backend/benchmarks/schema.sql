@@ -0,0 +1,117 @@
+-- Schemat bazowy do benchmarkow - tabele z README bez wlasciciela i bez triggera clean_bare_links
+-- (czyszczenie linkow nie ma wplywu na odczyty API, a spowalnia seedowanie milionow wierszy).
+-- Pozostale obiekty (combined_score, sentiment_daily, indeksy) tworza migracje z backend/migrations.
+
+create table public.report
+(
+    id   integer not null
+        constraint report_pk
+            primary key,
+    date date    not null
+);
+
+create table public.section
+(
+    id                    integer         not null
+        constraint section_pk
+            primary key,
+    report_id             integer         not null
+        constraint section_report
+            references public.report,
+    section_code          varchar(2)      not null,
+    section_name          varchar(20)     not null,
+    safety_score          integer         not null,
+    rating                varchar(20)     not null,
+    median_margin         numeric(20, 18) not null,
+    median_roe            numeric(20, 18) not null,
+    median_pe             numeric(20, 18) not null,
+    median_divident_yield numeric(20, 18) not null,
+    companies_count       integer         not null,
+    total_cap_pln         bigint          not null
+);
+
+create table public.pkd
+(
+    pkd   varchar(1)   not null
+        constraint pkd_pk
+            primary key,
+    nazwa varchar(255) not null
+);
+
+create table public.ceidg
+(
+    id        integer generated always as identity
+        constraint ceidg_pk
+            primary key,
+    pkd_id    varchar(2) not null
+        constraint ceidg_pkd
+            references public.pkd,
+    wskaznik  bigint,
+    utworzono timestamp
+);
+
+create table public.gus
+(
+    id        integer    not null
+        constraint gus_pk
+            primary key,
+    pkd       varchar(2) not null
+        constraint gus_pkd
+            references public.pkd,
+    wskaznik  numeric(6, 2),
+    timestamp timestamp,
+    year_0    numeric(1000, 5),
+    year_1    numeric(1000, 5),
+    year_2    numeric(1000, 5),
+    year_3    numeric(1000, 5),
+    year_4    numeric(1000, 5)
+);
+
+create table public.tag
+(
+    id       integer     not null
+        constraint tag_pk
+            primary key,
+    tag_name varchar(50) not null,
+    pkd_id   varchar(2)  not null
+        constraint tagi_pkd
+            references public.pkd
+);
+
+create table public.komentarz_youtube
+(
+    id        integer not null
+        constraint komentarz_youtube_pk
+            primary key,
+    komentarz text    not null,
+    tag_id    integer not null
+        constraint komentarze_youtube_tag
+            references public.tag,
+    timestamp timestamp,
+    emocje    integer
+);
+
+create table public.post_wykop
+(
+    id        integer not null
+        constraint post_wykop_pk
+            primary key,
+    tag_id    integer not null
+        constraint post_wykop_tag
+            references public.tag,
+    post      text    not null,
+    emocje    integer,
+    timestamp timestamp
+);
+
+create table public.slownik_szegolowy_pkd
+(
+    id              integer      not null
+        constraint slownik_szegolowy_pkd_pk
+            primary key,
+    nazwa_szegolowa varchar(255) not null,
+    pkd_pkd         varchar(1)   not null
+        constraint slownik_sekcji_pkd_pkd
+            references public.pkd,
+    pkd_2           integer
+);
@@ -0,0 +1,179 @@
+"""
+Wypelnia lokalna baze Postgres (NIE produkcyjna) syntetycznymi danymi do benchmarkow API.
+
+Tworzy schemat z schema.sql, generuje dane po stronie serwera (generate_series, deterministycznie
+dzieki setseed) i na koncu wykonuje migracje z backend/migrations, ktore przeliczaja agregaty
+sentiment_daily i zakladaja indeksy. --reset usuwa wszystkie tabele w schemacie public.
+Zmienna DB_HOST musi byc ustawiona jawnie - domyslna konfiguracja z migrate.py wskazuje na produkcje.
+
+    cd backend
+    docker compose -f benchmarks/docker-compose.bench.yml up -d
+    DB_HOST=127.0.0.1 DB_PORT=55432 DB_NAME=bench DB_USER=hack DB_PASS=bench \\
+        python benchmarks/seed.py --reset --reports 365 --tags 60 --youtube 2000000 --wykop 2000000 --days 365
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+import psycopg2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import migrate
+
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schema.sql")
+
+PKD_SECTIONS = {
+    "A": "Rolnictwo, leśnictwo, łowiectwo i rybactwo",
+    "B": "Górnictwo i wydobywanie",
+    "C": "Przetwórstwo przemysłowe",
+    "D": "Wytwarzanie i zaopatrywanie w energię elektryczną",
+    "E": "Dostawa wody; gospodarowanie ściekami i odpadami",
+    "F": "Budownictwo",
+    "G": "Handel hurtowy i detaliczny",
+    "H": "Transport i gospodarka magazynowa",
+    "I": "Zakwaterowanie i gastronomia",
+    "J": "Informacja i komunikacja",
+    "K": "Działalność finansowa i ubezpieczeniowa",
+    "L": "Obsługa rynku nieruchomości",
+    "M": "Działalność profesjonalna, naukowa i techniczna",
+    "N": "Usługi administrowania",
+    "O": "Administracja publiczna i obrona narodowa",
+    "P": "Edukacja",
+    "Q": "Opieka zdrowotna i pomoc społeczna",
+    "R": "Kultura, rozrywka i rekreacja",
+    "S": "Pozostała działalność usługowa",
+    "T": "Gospodarstwa domowe zatrudniające pracowników",
+    "U": "Organizacje i zespoły eksterytorialne",
+}
+
+logger = logging.getLogger("bench_seed")
+
+
+def timed(cur, label, sql, params=None):
+    start = time.perf_counter()
+    cur.execute(sql, params)
+    logger.info(f"{label}: {cur.rowcount} wierszy w {time.perf_counter() - start:.1f}s")
+
+
+def reset_schema(cur):
+    cur.execute("DROP SCHEMA public CASCADE")
+    cur.execute("CREATE SCHEMA public")
+
+
+def seed(cur, args):
+    cur.execute("SELECT setseed(%s)", (args.seed,))
+
+    cur.execute("CREATE TEMP TABLE pkd_codes (idx integer, code varchar(1)) ON COMMIT DROP")
+    cur.executemany("INSERT INTO pkd_codes VALUES (%s, %s)", list(enumerate(PKD_SECTIONS, start=1)))
+    cur.executemany("INSERT INTO pkd (pkd, nazwa) VALUES (%s, %s)", list(PKD_SECTIONS.items()))
+    sections = len(PKD_SECTIONS)
+
+    timed(cur, "report", """
+        INSERT INTO report (id, date)
+        SELECT g, current_date - (%(n)s - g)
+        FROM generate_series(1, %(n)s) g
+    """, {"n": args.reports})
+
+    timed(cur, "section", """
+        INSERT INTO section (id, report_id, section_code, section_name, safety_score, rating,
+                             median_margin, median_roe, median_pe, median_divident_yield,
+                             companies_count, total_cap_pln)
+        SELECT (r - 1) * %(sections)s + p.idx, r, p.code, left(k.nazwa, 20), s.score,
+               CASE WHEN s.score >= 80 THEN 'A (Strong)' WHEN s.score >= 60 THEN 'B (Stable)'
+                    WHEN s.score >= 40 THEN 'C (Weak)' ELSE 'D (Speculative)' END,
+               random() * 0.3, random() * 0.25, 3 + random() * 60, random() * 0.08,
+               1 + (random() * 40)::int, (1e8 + random() * 1e11)::bigint
+        FROM generate_series(1, %(reports)s) r
+                 CROSS JOIN pkd_codes p
+                 JOIN pkd k ON k.pkd = p.code
+                 CROSS JOIN LATERAL (SELECT (random() * 100)::int AS score) s
+    """, {"sections": sections, "reports": args.reports})
+
+    # GUS: jeden wpis na sekcje na miesiac z zakresu
+    timed(cur, "gus", """
+        INSERT INTO gus (id, pkd, wskaznik, timestamp, year_0, year_1, year_2, year_3, year_4)
+        SELECT row_number() OVER (), p.code, round((random() * 100)::numeric, 2), m,
+               random() * 500, random() * 500, random() * 500, random() * 500, random() * 500
+        FROM generate_series(now() - make_interval(days => %(days)s), now(), interval '1 month') m
+                 CROSS JOIN pkd_codes p
+    """, {"days": args.days})
+
+    # CEIDG: jeden wpis na sekcje na tydzien z zakresu
+    timed(cur, "ceidg", """
+        INSERT INTO ceidg (pkd_id, wskaznik, utworzono)
+        SELECT p.code, (random() * 100)::bigint, w
+        FROM generate_series(now() - make_interval(days => %(days)s), now(), interval '1 week') w
+                 CROSS JOIN pkd_codes p
+    """, {"days": args.days})
+
+    timed(cur, "tag", """
+        INSERT INTO tag (id, tag_name, pkd_id)
+        SELECT g, 'tag_' || g, p.code
+        FROM generate_series(1, %(tags)s) g
+                 JOIN pkd_codes p ON p.idx = 1 + (g - 1) %% %(sections)s
+    """, {"tags": args.tags, "sections": sections})
+
+    timed(cur, "komentarz_youtube", """
+        INSERT INTO komentarz_youtube (id, komentarz, tag_id, timestamp, emocje)
+        SELECT g, 'syntetyczny komentarz ' || g || ' ' || md5(g::text),
+               1 + (g %% %(tags)s), now() - random() * make_interval(days => %(days)s),
+               CASE WHEN random() < 0.05 THEN NULL ELSE (random() * 100)::int END
+        FROM generate_series(1, %(n)s) g
+    """, {"n": args.youtube, "tags": args.tags, "days": args.days})
+
+    timed(cur, "post_wykop", """
+        INSERT INTO post_wykop (id, tag_id, post, emocje, timestamp)
+        SELECT g, 1 + (g %% %(tags)s), 'syntetyczny wpis ' || g || ' ' || md5(g::text),
+               CASE WHEN random() < 0.05 THEN NULL ELSE (random() * 100)::int END,
+               now() - random() * make_interval(days => %(days)s)
+        FROM generate_series(1, %(n)s) g
+    """, {"n": args.wykop, "tags": args.tags, "days": args.days})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Syntetyczne dane do benchmarkow API")
+    parser.add_argument("--reset", action="store_true", help="usun wszystkie tabele w schemacie public przed seedowaniem")
+    parser.add_argument("--reports", type=int, default=365, help="liczba raportow gieldowych (jeden dziennie)")
+    parser.add_argument("--tags", type=int, default=60)
+    parser.add_argument("--youtube", type=int, default=1_000_000, help="liczba komentarzy YouTube")
+    parser.add_argument("--wykop", type=int, default=1_000_000, help="liczba wpisow Wykop")
+    parser.add_argument("--days", type=int, default=365, help="zakres dat komentarzy, GUS i CEIDG")
+    parser.add_argument("--seed", type=float, default=0.42, help="ziarno random() (-1..1)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if not os.getenv("DB_HOST"):
+        logger.error("Ustaw DB_HOST (i pozostałe DB_*) na lokalną bazę testową.")
+        sys.exit(1)
+    logger.info(f"Baza: {migrate.DB_CONFIG['host']}:{migrate.DB_CONFIG['port']}/{migrate.DB_CONFIG['dbname']}")
+
+    conn = psycopg2.connect(**migrate.DB_CONFIG)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT to_regclass('public.report') IS NOT NULL")
+            if cur.fetchone()[0] and not args.reset:
+                logger.error("Baza zawiera już tabele - uruchom z --reset, jeśli to na pewno baza testowa.")
+                sys.exit(1)
+
+            if args.reset:
+                reset_schema(cur)
+            with open(SCHEMA_FILE, encoding="utf-8") as f:
+                cur.execute(f.read())
+            seed(cur, args)
+        conn.commit()
+
+        migrate.migrate(conn, migrate.load_migrations())
+
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("VACUUM ANALYZE")
+        logger.info("Gotowe.")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
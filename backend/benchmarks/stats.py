@@ -0,0 +1,4 @@
+def percentile(samples, p):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(p / 100 * (len(ordered) - 1)))
+    return ordered[index]
@@ -0,0 +1,214 @@
+import asyncio
+import functools
+import inspect
+import time
+from collections import OrderedDict, namedtuple
+
+from fastapi import HTTPException, Request, Response
+
+# Odpowiedz handlera (np. szybka sciezka orjson) trzymana jako bajty - middleware (CORS, kompresja)
+# modyfikuje naglowki obiektu Response, wiec kazde trafienie dostaje nowy obiekt
+CachedResponse = namedtuple("CachedResponse", ["body", "status_code", "headers", "media_type"])
+
+
+def freeze(value):
+    if isinstance(value, Response):
+        headers = {k: v for k, v in value.headers.items() if k != "content-length"}
+        return CachedResponse(value.body, value.status_code, headers, value.media_type)
+    return value
+
+
+def thaw(value):
+    if isinstance(value, CachedResponse):
+        return Response(content=value.body, status_code=value.status_code, headers=value.headers,
+                        media_type=value.media_type)
+    return value
+
+
+class ResponseCache:
+    """
+    In-process TTL cache for read-only handlers, bounded with LRU eviction.
+    Concurrent misses for the same key are coalesced: one request runs the handler, the others wait for it.
+    """
+
+    def __init__(self, max_entries=512, flight_timeout=10.0):
+        self.max_entries = max_entries
+        self.flight_timeout = flight_timeout
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._in_flight = {}  # key -> Future z wynikiem handlera prowadzacego
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+        self.flight_timeouts = 0
+        self.flight_failures = 0
+
+    @staticmethod
+    def make_key(request: Request):
+        query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+        return f"{request.url.path}?{query}"
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, prefix=None):
+        """Drops every entry (or only those whose path starts with prefix), returns how many were removed"""
+        if prefix is None:
+            removed = len(self._entries)
+            self._entries.clear()
+            return removed
+
+        keys = [k for k in self._entries if k.startswith(prefix)]
+        for k in keys:
+            del self._entries[k]
+        return len(keys)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "in_flight": len(self._in_flight),
+            "coalesced": self.coalesced,
+            "flight_timeouts": self.flight_timeouts,
+            "flight_failures": self.flight_failures,
+        }
+
+    async def _wait_for_flight(self, key):
+        """
+        Result of the in-flight handler for key: (value, headers), an HTTPException to re-raise,
+        or None when there is nothing to wait for (no flight, it failed or took too long).
+        """
+        while True:
+            flight = self._in_flight.get(key)
+            if flight is None:
+                return None
+            try:
+                outcome = await asyncio.wait_for(asyncio.shield(flight), timeout=self.flight_timeout)
+            except asyncio.TimeoutError:
+                # Nie czekamy dluzej na wolne zapytanie - ten request liczy wynik sam
+                self.flight_timeouts += 1
+                return None
+            if outcome is not None:
+                self.coalesced += 1
+                return outcome
+            # Prowadzacy zakonczyl sie bledem - nie przekazujemy go dalej, kolejny request przejmuje obliczenie
+            self.flight_failures += 1
+
+    def cached(self, ttl):
+        """Decorator for FastAPI handlers - the key is built from the request path and query params"""
+        def decorator(func):
+            sig = inspect.signature(func)
+            wants_request = "request" in sig.parameters
+
+            @functools.wraps(func)
+            async def wrapper(*args, request: Request, **kwargs):
+                key = self.make_key(request)
+                # Naglowki ustawione przez handler na wstrzyknietym Response (np. kursor strony) tez sa cache'owane
+                response = kwargs.get("response")
+                entry = self.get(key)
+                if entry is not None:
+                    value, headers = entry
+                    if response is not None:
+                        response.headers.update(headers)
+                    return thaw(value)
+
+                outcome = await self._wait_for_flight(key)
+                if isinstance(outcome, HTTPException):
+                    raise outcome
+                if outcome is not None:
+                    value, headers = outcome
+                    if response is not None:
+                        response.headers.update(headers)
+                    return thaw(value)
+
+                if wants_request:
+                    kwargs["request"] = request
+                if key in self._in_flight:
+                    # Po timeoucie czekania - liczymy obok, nie podmieniajac prowadzacego
+                    return await func(*args, **kwargs)
+
+                flight = asyncio.get_running_loop().create_future()
+                self._in_flight[key] = flight
+                outcome = None
+                try:
+                    value = await func(*args, **kwargs)
+                    outcome = (freeze(value), dict(response.headers) if response is not None else {})
+                    self.set(key, outcome, ttl)
+                    return value
+                except HTTPException as e:
+                    # 404 itp. sa deterministyczne - czekajacy dostaja ten sam blad
+                    outcome = e
+                    raise
+                finally:
+                    del self._in_flight[key]
+                    flight.set_result(outcome)
+
+            if not wants_request:
+                params = list(sig.parameters.values())
+                params.append(inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request))
+                wrapper.__signature__ = sig.replace(parameters=params)
+            return wrapper
+        return decorator
+
+
+class ReloadingValue:
+    """
+    Value loaded with load(*args), kept for ttl seconds or until invalidate(). Concurrent callers
+    of an expired value wait for a single load instead of each running their own.
+    """
+
+    def __init__(self, load, ttl):
+        self.load = load
+        self.ttl = ttl
+        self.value = None
+        self.expires_at = 0.0
+        self.loads = 0
+        self._lock = asyncio.Lock()
+
+    async def current(self):
+        if self.expires_at > time.monotonic():
+            return self.value
+        async with self._lock:
+            # Inne zapytanie moglo juz wczytac wartosc, gdy czekalismy na blokade
+            if self.expires_at <= time.monotonic():
+                await self._load()
+        return self.value
+
+    async def reload(self, *args):
+        """Unconditional load; args are passed on to load()"""
+        async with self._lock:
+            await self._load(*args)
+        return self.value
+
+    async def _load(self, *args):
+        self.value = await self.load(*args)
+        self.expires_at = time.monotonic() + self.ttl
+        self.loads += 1
+
+    def invalidate(self):
+        self.expires_at = 0.0
@@ -0,0 +1,151 @@
+"""
+Sprawdza przez EXPLAIN, czy najczestsze zapytania API korzystaja z indeksow z migracji.
+
+Zapytania sa budowane z tych samych modeli i helperow co endpointy w main.py, z id najnowszego
+raportu i id tagow wczytanymi z bazy tak jak ReferenceData (endpointy nie uzywaja podzapytan). Domyslnie
+sprawdzanie odbywa sie z enable_seqscan = off, zeby wynik nie zalezal od rozmiaru tabel
+(na malej bazie planner i tak wybierze seq scan). --natural uzywa planu bez tej podpowiedzi.
+
+    python check_query_plans.py
+    python check_query_plans.py --natural --verbose
+"""
+import argparse
+import json
+import sys
+from datetime import date, timedelta
+
+import psycopg2
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import psycopg2 as pg_dialect
+
+from migrate import DB_CONFIG
+from main import (
+    SectionDB, CeidgDB, GusScores, YoutubeCommentDB, WykopPostDB, SentimentDailyDB, CombinedScoreDB,
+    build_reference_data, reference_data_stmts, rollup_avg, sector_comments_stmt, sector_history_stmt,
+    search_candidates_stmt, search_config,
+)
+
+
+def load_reference_data(cur):
+    """ReferenceData z tych samych zapytan co main.load_reference_data"""
+    results = []
+    for stmt in reference_data_stmts():
+        compiled = compile_stmt(stmt)
+        cur.execute(str(compiled), compiled.params)
+        results.append(cur.fetchall())
+    return build_reference_data(*results)
+
+
+def hot_queries(ref, code="F"):
+    """(nazwa, zapytanie, oczekiwany indeks) dla sciezek uzywanych przez endpointy"""
+    start_date = date.today() - timedelta(days=90)
+    tag_ids = ref.tags_for(code)
+    latest_report = reference_data_stmts()[0]
+
+    return [
+        ("latest report id",
+         latest_report,
+         "report_date_idx"),
+        ("sections of the latest report",
+         select(SectionDB).where(SectionDB.report_id == ref.latest_report_id),
+         "section_report_code_idx"),
+        ("latest section of a sector",
+         select(SectionDB).where(SectionDB.report_id == ref.latest_report_id, SectionDB.section_code == code),
+         "section_report_code_idx"),
+        ("sector market history",
+         sector_history_stmt(code),
+         "section_code_report_idx"),
+        ("sector market history page",
+         sector_history_stmt(code, date_from=start_date, limit=100),
+         "report_date_idx"),
+        ("youtube comments of a sector",
+         sector_comments_stmt(YoutubeCommentDB, tag_ids, limit=100),
+         "komentarz_youtube_tag_ts_idx"),
+        ("wykop posts of a sector",
+         sector_comments_stmt(WykopPostDB, tag_ids, limit=100),
+         "post_wykop_tag_ts_idx"),
+        ("ceidg history of a sector",
+         select(CeidgDB.utworzono, CeidgDB.wskaznik).where(CeidgDB.pkd_id == code, CeidgDB.utworzono >= start_date),
+         "ceidg_pkd_utworzono_idx"),
+        ("gus history of a sector",
+         select(GusScores.timestamp, GusScores.wskaznik).where(GusScores.pkd == code, GusScores.timestamp >= start_date),
+         "gus_pkd_timestamp_idx"),
+        ("daily sentiment of a sector",
+         select(SentimentDailyDB.day, rollup_avg())
+         .where(SentimentDailyDB.pkd == code, SentimentDailyDB.source == "youtube", SentimentDailyDB.day >= start_date)
+         .group_by(SentimentDailyDB.day),
+         "sentiment_daily_pk"),
+        ("youtube comment search",
+         search_candidates_stmt("youtube", func.websearch_to_tsquery(search_config(), "budowa")),
+         "komentarz_youtube_search_idx"),
+        ("wykop post search",
+         search_candidates_stmt("wykop", func.websearch_to_tsquery(search_config(), "budowa")),
+         "post_wykop_search_idx"),
+        ("combined score of a sector",
+         select(CombinedScoreDB).where(CombinedScoreDB.section_code == code),
+         "combined_score_pk"),
+    ]
+
+
+def used_indexes(plan):
+    found = set()
+    if isinstance(plan, dict):
+        if "Index Name" in plan:
+            found.add(plan["Index Name"])
+        for value in plan.values():
+            found |= used_indexes(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            found |= used_indexes(item)
+    return found
+
+
+def compile_stmt(stmt):
+    # render_postcompile rozwija IN (lista id) do zwyklych parametrow - tak jak przy wykonaniu przez SQLAlchemy
+    return stmt.compile(dialect=pg_dialect.dialect(), compile_kwargs={"render_postcompile": True})
+
+
+def explain(cur, stmt):
+    compiled = compile_stmt(stmt)
+    cur.execute("EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params)
+    plan = cur.fetchone()[0]
+    return plan if isinstance(plan, list) else json.loads(plan)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--code", default="F", help="sekcja PKD uzyta w zapytaniach")
+    parser.add_argument("--natural", action="store_true", help="nie wylaczaj seq scan w plannerze")
+    parser.add_argument("--verbose", action="store_true", help="wypisz pelne plany")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    failures = 0
+    try:
+        with conn.cursor() as cur:
+            if not args.natural:
+                cur.execute("SET enable_seqscan = off")
+
+            ref = load_reference_data(cur)
+            if not ref.tags_for(args.code):
+                print(f"Uwaga: sekcja {args.code} nie ma tagów - zapytania o komentarze nie użyją indeksu")
+
+            for name, stmt, expected in hot_queries(ref, args.code):
+                plan = explain(cur, stmt)
+                indexes = used_indexes(plan)
+                ok = expected in indexes
+                failures += not ok
+
+                print(f"[{'OK' if ok else 'BRAK'}] {name:<32} oczekiwany: {expected:<30} "
+                      f"uzyte: {', '.join(sorted(indexes)) or '-'}")
+                if args.verbose:
+                    print(json.dumps(plan, indent=2))
+        conn.rollback()
+    finally:
+        conn.close()
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import asyncio
+import itertools
+import json
+import logging
+import time
+
+import asyncpg
+
+logger = logging.getLogger("meluzyna.events")
+
+INGEST_CHANNEL = "meluzyna_ingest"
+SCORES_CHANNEL = "meluzyna_scores"
+
+# Pola porownywane miedzy snapshotami - computed_at zmienia sie przy kazdym przeliczeniu
+SCORE_FIELDS = ("section_name", "market_score", "gus_score", "ceidg_score", "social_score", "final_score")
+
+
+def diff_scores(old, new):
+    """Changed fields per section plus the codes of removed sections; None when nothing changed"""
+    changed = []
+    for code, row in new.items():
+        before = old.get(code, {})
+        fields = {f: row.get(f) for f in SCORE_FIELDS if before.get(f) != row.get(f)}
+        if fields:
+            changed.append({"section_code": code, **fields})
+    removed = [code for code in old if code not in new]
+    if not changed and not removed:
+        return None
+    return {"changed": changed, "removed": removed}
+
+
+def format_event(event_id, event, data):
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, default=str, ensure_ascii=False)}\n\n"
+
+
+class ScoreBroadcaster:
+    """
+    One LISTEN connection per process fanned out to every connected SSE client.
+
+    meluzyna_ingest (collector triggers) -> debounced on_ingest() that refreshes the snapshot,
+    meluzyna_scores (sent by the refresh on commit) -> reload the snapshot and push the diff.
+    Each client has a bounded queue; a client that falls behind gets a fresh snapshot instead of the backlog.
+    """
+
+    def __init__(self, dsn, load_snapshot, on_ingest, on_scores_changed, debounce, queue_size, on_ingest_notified=None):
+        self.dsn = dsn
+        self.load_snapshot = load_snapshot
+        self.on_ingest = on_ingest
+        self.on_ingest_notified = on_ingest_notified
+        self.on_scores_changed = on_scores_changed
+        self.debounce = debounce
+        self.queue_size = queue_size
+        self.snapshot = {}
+        self.clients = set()
+        self.connected = False
+        self.notifications = 0
+        self.events_sent = 0
+        self.resyncs = 0
+        self.ingest_reruns = 0
+        self._event_ids = itertools.count(1)
+        self._tasks = set()
+        self._pending_ingest = None
+        self._ingest_running = False
+        self._ingest_rerun = False
+        self._reload_lock = asyncio.Lock()
+
+    async def subscribe(self):
+        """Client queue starting with the current snapshot; without a loaded snapshot the first event is a diff"""
+        if not self.snapshot:
+            # Polaczenie LISTEN moglo jeszcze nie wczytac wynikow (albo DB_LISTEN_DSN jest nieosiagalny)
+            try:
+                await self.reload()
+            except Exception as e:
+                logger.error(f"Błąd wczytywania snapshotu combined_score: {e}")
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        if self.snapshot:
+            queue.put_nowait(self._snapshot_event())
+        self.clients.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self.clients.discard(queue)
+
+    def _snapshot_event(self):
+        rows = sorted(self.snapshot.values(), key=lambda r: r.get("final_score") or 0, reverse=True)
+        return format_event(next(self._event_ids), "snapshot", rows)
+
+    def publish(self, event, data):
+        message = format_event(next(self._event_ids), event, data)
+        for queue in list(self.clients):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Klient nie nadaza - zamiast zaleglych roznic dostaje aktualny snapshot
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self._snapshot_event())
+                self.resyncs += 1
+        self.events_sent += 1
+
+    async def reload(self):
+        """Reads the stored snapshot and publishes what changed since the previous one"""
+        async with self._reload_lock:
+            rows = await self.load_snapshot()
+            new = {row["section_code"]: row for row in rows}
+            diff = diff_scores(self.snapshot, new)
+            self.snapshot = new
+        if diff:
+            self.publish("diff", diff)
+        return diff
+
+    def _spawn(self, coro):
+        # Petla zdarzen trzyma tylko slaba referencje do zadania - bez tego GC moze je przerwac
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _on_notification(self, connection, pid, channel, payload):
+        self.notifications += 1
+        if channel == SCORES_CHANNEL:
+            self._spawn(self._handle_scores_changed())
+            return
+
+        if self.on_ingest_notified:
+            self.on_ingest_notified(payload)
+        if self._pending_ingest is None or self._pending_ingest.done():
+            # Kolektory zapisuja wsadami - jedno przeliczenie na okno debounce
+            self._pending_ingest = self._spawn(self._handle_ingest(payload))
+        elif self._ingest_running:
+            # Trwajace przeliczenie moglo juz odczytac dane sprzed tego zapisu - jedno kolejne po nim
+            self._ingest_rerun = True
+
+    async def _handle_ingest(self, table):
+        while True:
+            await asyncio.sleep(self.debounce)
+            self._ingest_running = True
+            try:
+                await self.on_ingest()
+            except Exception as e:
+                logger.error(f"Błąd przeliczania po zapisie do {table}: {e}")
+            finally:
+                self._ingest_running = False
+            if not self._ingest_rerun:
+                return
+            self._ingest_rerun = False
+            self.ingest_reruns += 1
+
+    async def _handle_scores_changed(self):
+        try:
+            self.on_scores_changed()
+            await self.reload()
+        except Exception as e:
+            logger.error(f"Błąd wczytywania snapshotu combined_score: {e}")
+
+    async def run(self, keepalive_interval=30, retry_interval=5):
+        """Keeps the LISTEN connection open, reconnecting (and resyncing) after failures"""
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                await connection.add_listener(INGEST_CHANNEL, self._on_notification)
+                await connection.add_listener(SCORES_CHANNEL, self._on_notification)
+                self.connected = True
+                logger.info("Nasłuchiwanie powiadomień o nowych danych")
+
+                # Powiadomienia z czasu bez polaczenia przepadly
+                await self.reload()
+                while True:
+                    await asyncio.sleep(keepalive_interval)
+                    await connection.execute("SELECT 1")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Połączenie LISTEN przerwane: {e}")
+            finally:
+                self.connected = False
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(retry_interval)
+
+    async def stream(self, queue, heartbeat):
+        """SSE body for one client; comment lines keep proxies from closing an idle connection"""
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield f": ping {int(time.time())}\n\n"
+        finally:
+            self.unsubscribe(queue)
+
+    def stats(self):
+        return {
+            "connected": self.connected,
+            "clients": len(self.clients),
+            "sections": len(self.snapshot),
+            "notifications": self.notifications,
+            "events_sent": self.events_sent,
+            "resyncs": self.resyncs,
+            "ingest_reruns": self.ingest_reruns,
+        }
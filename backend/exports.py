@@ -0,0 +1,107 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+MEDIA_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+EXTENSIONS = {"parquet": "parquet", "arrow": "arrows"}
+
+SECTION_SCHEMA = pa.schema([
+    ("date", pa.date32()),
+    ("report_id", pa.int32()),
+    ("section_code", pa.string()),
+    ("section_name", pa.string()),
+    ("safety_score", pa.int32()),
+    ("rating", pa.string()),
+    ("median_margin", pa.decimal128(20, 18)),
+    ("median_roe", pa.decimal128(20, 18)),
+    ("median_pe", pa.decimal128(20, 18)),
+    ("median_divident_yield", pa.decimal128(20, 18)),
+    ("companies_count", pa.int32()),
+    ("total_cap_pln", pa.int64()),
+])
+
+HISTORY_SCHEMA = pa.schema([
+    ("section_code", pa.string()),
+    ("date", pa.date32()),
+    ("wykop", pa.float64()),
+    ("youtube", pa.float64()),
+    ("ceidg", pa.float64()),
+    ("gus", pa.float64()),
+])
+
+YOUTUBE_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("section_code", pa.string()),
+    ("tag_id", pa.int32()),
+    ("timestamp", pa.timestamp("us")),
+    ("emocje", pa.int32()),
+    ("komentarz", pa.string()),
+])
+
+WYKOP_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("section_code", pa.string()),
+    ("tag_id", pa.int32()),
+    ("timestamp", pa.timestamp("us")),
+    ("emocje", pa.int32()),
+    ("post", pa.string()),
+])
+
+
+class _ChunkSink:
+    """Write-only file object; the writer output is drained after every batch and sent to the client"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self):
+        return True
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def arrow_stream(partitions, schema, fmt):
+    """
+    Encodes an async iterator of row-dict lists as a Parquet file (one row group per partition)
+    or an Arrow IPC stream, yielding the bytes as soon as each partition is written.
+    """
+    sink = _ChunkSink()
+    target = pa.PythonFile(sink, mode="w")
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(target, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(target, schema)
+
+    try:
+        async for rows in partitions:
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+
+    chunk = sink.drain()
+    if chunk:
+        yield chunk
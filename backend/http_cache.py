@@ -0,0 +1,98 @@
+import gzip
+import hashlib
+import logging
+
+import brotli
+from fastapi import FastAPI, Request, Response
+
+from cache import ReloadingValue, ResponseCache
+
+logger = logging.getLogger("meluzyna.http_cache")
+
+COMPRESSIBLE_TYPES = ("application/json",)
+
+
+class VersionTracker(ReloadingValue):
+    """Data version used in ETags, reloaded at most every ttl seconds (or after invalidate())"""
+
+
+def negotiate_encoding(accept_encoding):
+    """br > gzip > identity, honouring q=0 and the * wildcard"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+
+    for encoding in ("br", "gzip"):
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return "identity"
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+def make_etag(version, request: Request, encoding):
+    # Kodowanie jest czescia tagu - silny ETag musi oznaczac identyczne bajty odpowiedzi
+    source = f"{version!r}|{ResponseCache.make_key(request)}|{encoding}"
+    return '"' + hashlib.sha1(source.encode("utf-8")).hexdigest()[:24] + '"'
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or any(t.removeprefix("W/") == etag for t in tags)
+
+
+def install(app: FastAPI, versions: VersionTracker, max_age_for, min_size):
+    """
+    ETag / If-None-Match for the data endpoints (max_age_for(path) is not None) and gzip/brotli
+    for JSON bodies of at least min_size bytes. A matching If-None-Match returns 304 without calling the handler.
+    """
+
+    @app.middleware("http")
+    async def conditional_and_compressed(request: Request, call_next):
+        if request.method != "GET":
+            return await call_next(request)
+
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+        max_age = max_age_for(request.url.path)
+        validators = {}
+        if max_age is not None:
+            try:
+                etag = make_etag(await versions.current(), request, encoding)
+                validators = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}", "Vary": "Accept-Encoding"}
+                if etag_matches(request.headers.get("if-none-match"), etag):
+                    return Response(status_code=304, headers=validators)
+            except Exception as e:
+                logger.warning(f"Nie udało się ustalić wersji danych dla ETag: {e}")
+
+        response = await call_next(request)
+        if response.status_code == 200:
+            response.headers.update(validators)
+
+        content_type = response.headers.get("content-type", "")
+        if encoding == "identity" or not content_type.startswith(COMPRESSIBLE_TYPES) or "content-encoding" in response.headers:
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+        headers["vary"] = "Accept-Encoding"
+        if len(body) >= min_size:
+            body = compress(body, encoding)
+            headers["content-encoding"] = encoding
+        return Response(content=body, status_code=response.status_code, headers=headers)
@@ -1,23 +1,122 @@
 from numbers import Number
-from fastapi import FastAPI, Depends, HTTPException
+from decimal import Decimal
+import asyncio
+import hmac
+import json
+import logging
+import os
+
+import orjson
+from fastapi import FastAPI, Depends, HTTPException, Header, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker, declarative_base, relationship, selectinload
-from sqlalchemy import Column, Integer, String, Date, Numeric, ForeignKey, select, desc, BigInteger, func, TIMESTAMP, Float
+from sqlalchemy.orm import sessionmaker, declarative_base, relationship, selectinload, contains_eager, deferred
+from sqlalchemy.dialects.postgresql import TSVECTOR, insert as pg_insert
+from sqlalchemy import Column, Integer, String, Date, Numeric, ForeignKey, select, desc, BigInteger, func, TIMESTAMP, Float, Boolean, Text
 from pydantic import BaseModel, ConfigDict # Changed here
-from typing import List, Optional
-from datetime import date, timedelta
-from sqlalchemy import cast, Date
+from typing import Dict, List, Literal, Optional, Union
+from datetime import date, datetime, timedelta
+from sqlalchemy import cast, Date, and_, or_, literal_column, union_all
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
-DB_USER = "hack"
-DB_PASS = "HackNation!"
-DB_HOST = "212.132.76.195"
-DB_NAME = "hacknation_db"
-DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:5433/{DB_NAME}"
-
-engine = create_async_engine(DATABASE_URL, echo=False)
+from cache import ResponseCache
+from pooling import engine_options_from_env, database_url_query
+from replicas import ReplicaRouter
+import metrics
+import exports
+from events import ScoreBroadcaster, SCORES_CHANNEL
+from reference import ReferenceData, ReferenceRegistry
+from downsampling import lttb
+from scoring import ScoringConfig, ScoreTable, SOURCE_COLUMNS
+import http_cache
+
+DB_USER = os.getenv("DB_USER", "hack")
+DB_PASS = os.getenv("DB_PASS", "HackNation!")
+DB_HOST = os.getenv("DB_HOST", "212.132.76.195")
+DB_PORT = os.getenv("DB_PORT", os.getenv("DATABASE_PORT", "5433"))
+DB_NAME = os.getenv("DB_NAME", "hacknation_db")
+DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+# Repliki do odczytu: "host1:5433,host2:5433" (te same dane logowania i baza co primary)
+DB_REPLICA_HOSTS = [h.strip() for h in os.getenv("DB_REPLICA_HOSTS", "").split(",") if h.strip()]
+DB_REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", "30"))
+DB_REPLICA_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "5"))
+
+# Jak czesto (w sekundach) sprawdzamy, czy skrypty zasilajace dopisaly nowe dane do bazy
+SCORES_REFRESH_INTERVAL = int(os.getenv("SCORES_REFRESH_INTERVAL", "300"))
+
+# Czasy zycia (w sekundach) odpowiedzi w cache - dane zmieniaja sie kilka razy dziennie
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "512"))
+CACHE_TTL_MARKETS = int(os.getenv("CACHE_TTL_MARKETS", "900"))
+CACHE_TTL_CATEGORIES = int(os.getenv("CACHE_TTL_CATEGORIES", "86400"))
+CACHE_TTL_CEIDG = int(os.getenv("CACHE_TTL_CEIDG", "3600"))
+CACHE_TTL_SCORES = int(os.getenv("CACHE_TTL_SCORES", "300"))
+# Identyczne rownolegle zapytania czekaja na jedno obliczenie najwyzej tyle sekund, potem licza same
+COALESCE_TIMEOUT = float(os.getenv("COALESCE_TIMEOUT", "10"))
+
+# Co ile sekund przeladowac dane referencyjne (najnowszy raport, tagi, PKD) - dodatkowo po NOTIFY o nowych danych
+REFERENCE_TTL = int(os.getenv("REFERENCE_TTL", "300"))
+
+# Wagi zrodel w wyniku laczonym (np. "market=2,social=0.5", pominiete = 1) i normalizacja: none | minmax | zscore
+SCORING = ScoringConfig.from_spec(os.getenv("SCORE_WEIGHTS", ""), os.getenv("SCORE_NORMALIZATION", "none"))
+
+# Ile polaczen z puli moze naraz uzyc jedno zapytanie HTTP (niezalezne zapytania do zrodel)
+QUERY_FANOUT = int(os.getenv("QUERY_FANOUT", "5"))
+
+# Stronicowanie i strumieniowanie komentarzy
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "10000"))
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "1000"))
+MAX_REPORTS_PAGE = int(os.getenv("MAX_REPORTS_PAGE", "366"))
+MAX_CHART_POINTS = int(os.getenv("MAX_CHART_POINTS", "5000"))
+
+# Wyszukiwanie pelnotekstowe: ile najnowszych trafien na zrodlo jest rankingowanych (koszt nie rosnie z tabela)
+SEARCH_CONFIG = os.getenv("SEARCH_CONFIG", "public.meluzyna_pl")
+SEARCH_MAX_CANDIDATES = int(os.getenv("SEARCH_MAX_CANDIDATES", "2000"))
+SEARCH_MAX_PAGE = int(os.getenv("SEARCH_MAX_PAGE", "100"))
+
+# Eksport Parquet / Arrow IPC - tyle wierszy trafia do jednej grupy wierszy (row group / record batch)
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "50000"))
+
+# Zapytania SQL dluzsze niz tyle milisekund sa logowane jako wolne (0 wylacza)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+
+# Powiadomienia o nowych danych (LISTEN/NOTIFY) i strumien SSE /scores/stream.
+# LISTEN wymaga bezposredniego polaczenia z primary - PgBouncer w trybie transaction go nie obsluguje
+DB_LISTEN_DSN = os.getenv("DB_LISTEN_DSN", f"postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}")
+SCORES_EVENTS_DEBOUNCE = float(os.getenv("SCORES_EVENTS_DEBOUNCE", "10"))
+SSE_HEARTBEAT = float(os.getenv("SSE_HEARTBEAT", "15"))
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "100"))
+
+# Naglowki ETag / Cache-Control i kompresja odpowiedzi JSON (http_cache.py)
+ETAG_VERSION_TTL = float(os.getenv("ETAG_VERSION_TTL", "30"))
+HTTP_MAX_AGE_MEDIA = int(os.getenv("HTTP_MAX_AGE_MEDIA", "60"))
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+
+# Endpointy administracyjne wymagaja naglowka X-Admin-Token; bez ustawionego tokenu sa wylaczone
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+logger = logging.getLogger("meluzyna")
+
+# Pula polaczen konfigurowana zmiennymi DB_POOL_* / DB_PGBOUNCER (pooling.py)
+engine = create_async_engine(DATABASE_URL + database_url_query(), echo=False, **engine_options_from_env())
+metrics.instrument_engine(engine, SLOW_QUERY_MS)
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+replica_router = ReplicaRouter(
+    [f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{host}/{DB_NAME}" + database_url_query() for host in DB_REPLICA_HOSTS],
+    engine_options_from_env(),
+    DB_REPLICA_MAX_LAG,
+)
+for replica in replica_router.replicas:
+    metrics.instrument_engine(replica.engine, SLOW_QUERY_MS)
+
+
+def read_session_factory():
+    """Sessions for read-only work: a replica within the lag limit, otherwise the primary"""
+    return replica_router.session_factory(AsyncSessionLocal)
+
+
 Base = declarative_base()
 
 class ReportDB(Base):
@@ -42,6 +141,11 @@ class SectionDB(Base):
     total_cap_pln = Column(Integer)
     report = relationship("ReportDB", back_populates="sections")
 
+    @property
+    def date(self):
+        """Report date - the query has to load the report (contains_eager / selectinload)"""
+        return self.report.date
+
 class PKD(Base):
     __tablename__ = "pkd"
     pkd = Column(String(1), primary_key=True, index=True)
@@ -77,6 +181,8 @@ class YoutubeCommentDB(Base):
     tag_id = Column(Integer, ForeignKey("tags.id"))
     timestamp = Column(TIMESTAMP)
     emocje = Column(Integer)
+    # Generowana przez baze (migracja 0005), nie ladowana razem z wierszem
+    search_tsv = deferred(Column(TSVECTOR))
 
 class WykopPostDB(Base):
     __tablename__ = "post_wykop"
@@ -86,6 +192,51 @@ class WykopPostDB(Base):
     tag_id = Column(Integer, ForeignKey("tags.id"))
     emocje = Column(Integer)
     timestamp = Column(TIMESTAMP)
+    search_tsv = deferred(Column(TSVECTOR))
+
+class SentimentDailyDB(Base):
+    """Daily (pkd, source) rollup of emocje, maintained by the trigger_sentiment_daily triggers"""
+    __tablename__ = "sentiment_daily"
+    pkd = Column(String(2), primary_key=True)
+    source = Column(String(10), primary_key=True)
+    day = Column(Date, primary_key=True)
+    row_count = Column(Integer)
+    emocje_count = Column(Integer)
+    emocje_sum = Column(BigInteger)
+
+class SentimentTotalDB(Base):
+    """(pkd, source) totals of emocje over all rows, including those without a timestamp (migration 0011)"""
+    __tablename__ = "sentiment_total"
+    pkd = Column(String(2), primary_key=True)
+    source = Column(String(10), primary_key=True)
+    row_count = Column(Integer)
+    emocje_count = Column(Integer)
+    emocje_sum = Column(BigInteger)
+
+class CombinedScoreDB(Base):
+    """Snapshot of /scores, rebuilt by refresh_combined_scores()"""
+    __tablename__ = "combined_score"
+    section_code = Column(String(2), primary_key=True)
+    section_name = Column(String(255))
+    market_score = Column(Integer)
+    gus_score = Column(Float)
+    ceidg_score = Column(Float)
+    social_score = Column(Float)
+    final_score = Column(Float, nullable=False)
+    computed_at = Column(TIMESTAMP, nullable=False)
+
+class CombinedScoreMetaDB(Base):
+    """Single row: the source data version the combined_score snapshot was computed from"""
+    __tablename__ = "combined_score_meta"
+    id = Column(Boolean, primary_key=True, default=True)
+    data_version = Column(Text, nullable=False)
+    computed_at = Column(TIMESTAMP, nullable=False)
+
+class DataVersionDB(Base):
+    """Write counter per source table, incremented by notify_data_ingested() (migration 0010)"""
+    __tablename__ = "data_version"
+    table_name = Column(Text, primary_key=True)
+    version = Column(BigInteger, nullable=False)
 
 class SectionSchema(BaseModel):
     section_code: str
@@ -101,6 +252,25 @@ class SectionSchema(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+class SectorHistorySchema(SectionSchema):
+    report_id: int
+    date: date
+
+class SectorHistoryBucketSchema(BaseModel):
+    """resolution=week|month: medians over the reports of one bucket, date = first day of the bucket"""
+    date: date
+    section_code: str
+    section_name: str
+    reports: int
+    safety_score: float
+    rating: str
+    median_margin: float
+    median_pe: float
+    median_roe: float
+    median_divident_yield: float
+    total_cap_pln: float
+    companies_count: float
+
 class ReportSchema(BaseModel):
     id: int
     date: date
@@ -135,9 +305,24 @@ class CombinedScoreSchema(BaseModel):
     ceidg_score: Optional[float] = None      # Wynik z ceidg
     social_score: Optional[float] = None     # Wynik z social mediów
     final_score: float    # Średnia z obu
+    computed_at: Optional[datetime] = None   # Kiedy policzono snapshot
 
     model_config = ConfigDict(from_attributes=True)
 
+class SearchHitSchema(BaseModel):
+    source: str
+    id: int
+    section_code: Optional[str] = None
+    tag_id: Optional[int] = None
+    timestamp: Optional[datetime] = None
+    emocje: Optional[int] = None
+    rank: float
+    snippet: str
+
+class ScoringScenarioSchema(BaseModel):
+    weights: Dict[str, float] = {}    # np. {"market": 2, "social": 0.5}; pominiete zrodla maja wage 1
+    normalization: Literal["none", "minmax", "zscore"] = "none"
+
 class CeidgSimpleSchema(BaseModel):
     pkd_id: str
     wskaznik: int
@@ -154,8 +339,76 @@ class HistoryPoint(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+# Szybka sciezka (?fast=true) dla list: kolumny zamiast obiektow ORM, bez walidacji Pydantic
+# (wiersze z bazy sa zaufane) i serializacja orjson. Numeric -> float juz w SQL, bo orjson nie obsluguje Decimal.
+SECTION_COLUMNS = (
+    SectionDB.section_code,
+    SectionDB.section_name,
+    SectionDB.safety_score,
+    SectionDB.rating,
+    cast(SectionDB.median_margin, Float).label("median_margin"),
+    cast(SectionDB.median_pe, Float).label("median_pe"),
+    cast(SectionDB.median_roe, Float).label("median_roe"),
+    cast(SectionDB.median_divident_yield, Float).label("median_divident_yield"),
+    SectionDB.total_cap_pln,
+    SectionDB.companies_count,
+)
+
+
+def fast_response(rows, headers=None):
+    return Response(orjson.dumps([dict(row) for row in rows]), media_type="application/json", headers=headers)
+
+
 app = FastAPI()
 
+
+async def load_response_version():
+    """
+    Ingest write counter (data_version) + snapshot time - a new ETag after every insert, update or delete
+    in the source tables and after every combined_score refresh
+    """
+    async with read_session_factory()() as db:
+        version = await get_data_version(db)
+        computed_at = (await db.execute(select(CombinedScoreMetaDB.computed_at))).scalar_one_or_none()
+    return (version, computed_at)
+
+
+response_versions = http_cache.VersionTracker(load_response_version, ETAG_VERSION_TTL)
+
+# Cache-Control max-age zgodny z harmonogramem zasilania: raport dzienny, GUS/CEIDG rzadko, media na biezaco
+HTTP_MAX_AGE = (
+    ("/scores/stream", None),
+    ("/scores", SCORES_REFRESH_INTERVAL),
+    ("/markets", CACHE_TTL_MARKETS),
+    ("/categories", CACHE_TTL_CATEGORIES),
+    ("/ceidg", CACHE_TTL_CEIDG),
+    ("/charts", HTTP_MAX_AGE_MEDIA),
+    ("/komentarz_youtube", HTTP_MAX_AGE_MEDIA),
+    ("/post_wykop", HTTP_MAX_AGE_MEDIA),
+    ("/search", HTTP_MAX_AGE_MEDIA),
+)
+
+
+def http_max_age(path):
+    """max-age for data endpoints; None = no ETag (admin, metrics, SSE, exports, docs)"""
+    for prefix, max_age in HTTP_MAX_AGE:
+        if path.startswith(prefix):
+            return max_age
+    return None
+
+
+# Dodany przed CORS (CORS go opakowuje), wiec odpowiedzi 304 tez dostaja naglowki CORS
+http_cache.install(app, response_versions, http_max_age, COMPRESS_MIN_SIZE)
+
+
+def invalidate_response_caches():
+    """New data: drop cached handler results, the in-memory score table and reload the ETag version on the next request"""
+    global _score_table
+    response_cache.invalidate()
+    response_versions.invalidate()
+    _score_table = None
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -164,64 +417,220 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+metrics.install(app)
+
+response_cache = ResponseCache(max_entries=CACHE_MAX_ENTRIES, flight_timeout=COALESCE_TIMEOUT)
+
 async def get_db():
-    async with AsyncSessionLocal() as session:
+    """Read-only handlers - routed to a replica when one is configured and healthy"""
+    async with read_session_factory()() as session:
         yield session
 
+@app.on_event("startup")
+async def start_replica_health_checks():
+    if replica_router.replicas:
+        asyncio.create_task(replica_router.run_health_checks(DB_REPLICA_CHECK_INTERVAL))
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    # Fail closed - domyslne wdrozenie bez tokenu nie moze pozwalac kazdemu wymuszac przeliczen
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=503, detail="Endpointy administracyjne są wyłączone (brak ADMIN_TOKEN)")
+    if not hmac.compare_digest(x_admin_token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Brak uprawnień")
+
+def reference_data_stmts():
+    """Latest report, tag -> PKD, PKD names"""
+    return (
+        select(ReportDB.id, ReportDB.date).order_by(desc(ReportDB.date)).limit(1),
+        select(TagDB.id, TagDB.pkd_id),
+        select(PKD.pkd, PKD.nazwa),
+    )
+
+def build_reference_data(latest, tags, pkds):
+    latest_id, latest_date = latest[0] if latest else (None, None)
+    return ReferenceData(latest_id, latest_date, {tag_id: pkd for tag_id, pkd in tags if pkd}, dict(pkds))
+
+async def load_reference_data(session_factory=None):
+    results = await run_concurrently(*reference_data_stmts(), session_factory=session_factory)
+    return build_reference_data(*results)
+
+
+# Najnowszy raport, tag -> PKD i nazwy PKD w pamieci - handlery przekazuja gotowe id zamiast podzapytan
+reference_data = ReferenceRegistry(load_reference_data, REFERENCE_TTL)
+
+@app.on_event("startup")
+async def load_reference_data_on_startup():
+    try:
+        await reference_data.current()
+    except Exception as e:
+        logger.error(f"Nie udało się wczytać danych referencyjnych: {e}")
+
 @app.get("/")
 def read_root():
     return {"Hello": "World"}
 
 
 @app.get("/markets/reports/latest", response_model=ReportSchema)
+@response_cache.cached(ttl=CACHE_TTL_MARKETS)
 async def get_latest_report(db: AsyncSession = Depends(get_db)):
-    stmt = select(ReportDB).order_by(desc(ReportDB.date)).limit(1)
+    ref = await reference_data.current()
+    stmt = select(ReportDB).options(selectinload(ReportDB.sections)).where(ReportDB.id == ref.latest_report_id)
     result = await db.execute(stmt)
     latest_report = result.scalars().first()
 
     if not latest_report:
         raise HTTPException(status_code=404, detail="Brak raportów w bazie")
 
-    stmt_full = select(ReportDB).options(selectinload(ReportDB.sections)).where(ReportDB.id == latest_report.id)
-    result_full = await db.execute(stmt_full)
-    return result_full.scalars().first()
+    return latest_report
 
 @app.get("/markets/reports/history", response_model=List[ReportSchema])
-async def get_reports_history(limit: int = 5, db: AsyncSession = Depends(get_db)):
-    stmt = select(ReportDB).order_by(desc(ReportDB.date)).limit(limit)
+@response_cache.cached(ttl=CACHE_TTL_MARKETS)
+async def get_reports_history(
+    response: Response,
+    limit: int = Query(5, ge=1, le=MAX_REPORTS_PAGE),
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    after_date: Optional[date] = None,
+    after_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Reports (newest first) with their sections, optionally limited to [from, to].
+    A full page sets X-Next-After-Date / X-Next-After-Id for the next one.
+    """
+    stmt = (
+        select(ReportDB)
+        .options(selectinload(ReportDB.sections))
+        .where(*date_range_filter(ReportDB.date, date_from, date_to))
+    )
+    stmt = paginate_by_date(stmt, ReportDB.date, ReportDB.id, after_date, after_id).limit(limit)
     result = await db.execute(stmt)
-    return result.scalars().all()
+    reports = result.scalars().all()
+
+    if len(reports) == limit:
+        last = reports[-1]
+        response.headers.update({"X-Next-After-Date": last.date.isoformat(), "X-Next-After-Id": str(last.id)})
+    return reports
 
 @app.get("/markets/sectors/top", response_model=List[SectionSchema])
+@response_cache.cached(ttl=CACHE_TTL_MARKETS)
 async def get_top_sectors(limit: int = 5, db: AsyncSession = Depends(get_db)):
-    subquery = select(ReportDB.id).order_by(desc(ReportDB.date)).limit(1).scalar_subquery()
+    ref = await reference_data.current()
     stmt = (
         select(SectionDB)
-        .where(SectionDB.report_id == subquery)
+        .where(SectionDB.report_id == ref.latest_report_id)
         .order_by(desc(SectionDB.safety_score))
         .limit(limit)
     )
     result = await db.execute(stmt)
     return result.scalars().all()
 
-@app.get("/markets/sectors/{section_code}", response_model=List[SectionSchema])
-async def get_sector_history(section_code: str, db: AsyncSession = Depends(get_db)):
+def paginate_by_date(stmt, date_column, id_column, after_date, after_id):
+    """Keyset over (date DESC, id DESC) - the next page starts after (after_date, after_id)"""
+    if after_date is not None:
+        older = date_column < after_date
+        if after_id is not None:
+            older = or_(older, and_(date_column == after_date, id_column < after_id))
+        stmt = stmt.where(older)
+    return stmt.order_by(desc(date_column), desc(id_column))
+
+
+def sector_history_stmt(code, date_from=None, date_to=None, after_date=None, after_report_id=None, limit=None, fast=False):
+    """Section rows of one sector joined with their report date, newest first"""
     stmt = (
-        select(SectionDB)
+        (select(*SECTION_COLUMNS, SectionDB.report_id, ReportDB.date) if fast
+         else select(SectionDB).options(contains_eager(SectionDB.report)))
         .join(ReportDB)
-        .where(SectionDB.section_code == section_code.upper())
-        .order_by(desc(ReportDB.date))
+        .where(SectionDB.section_code == code, *date_range_filter(ReportDB.date, date_from, date_to))
     )
+    stmt = paginate_by_date(stmt, ReportDB.date, ReportDB.id, after_date, after_report_id)
+    return stmt.limit(limit) if limit else stmt
+
+
+def sector_history_buckets_stmt(code, resolution, date_from=None, date_to=None, after_date=None, limit=None):
+    """Weekly / monthly medians of one sector; a bucket is labelled with its first day"""
+    # Literal zamiast parametru - ten sam tekst wyrazenia w SELECT i GROUP BY
+    bucket = cast(func.date_trunc(literal_column(f"'{resolution}'"), ReportDB.date), Date).label("date")
+
+    def median(column):
+        return cast(func.percentile_cont(0.5).within_group(column), Float).label(column.key)
+
+    stmt = (
+        select(
+            bucket,
+            SectionDB.section_code,
+            func.max(SectionDB.section_name).label("section_name"),
+            func.count().label("reports"),
+            median(SectionDB.safety_score),
+            func.mode().within_group(SectionDB.rating).label("rating"),
+            median(SectionDB.median_margin),
+            median(SectionDB.median_pe),
+            median(SectionDB.median_roe),
+            median(SectionDB.median_divident_yield),
+            median(SectionDB.total_cap_pln),
+            median(SectionDB.companies_count),
+        )
+        .join(ReportDB)
+        .where(SectionDB.section_code == code, *date_range_filter(ReportDB.date, date_from, date_to))
+        .group_by(bucket, SectionDB.section_code)
+        .order_by(desc(bucket))
+    )
+    if after_date is not None:
+        # Kursor to poczatek kubelka, wiec wystarczy filtr na dacie raportu - bez HAVING
+        stmt = stmt.where(ReportDB.date < after_date)
+    return stmt.limit(limit) if limit else stmt
+
+
+@app.get(
+    "/markets/sectors/{section_code}",
+    response_model=Union[List[SectorHistorySchema], List[SectorHistoryBucketSchema]],
+)
+@response_cache.cached(ttl=CACHE_TTL_MARKETS)
+async def get_sector_history(
+    section_code: str,
+    response: Response,
+    fast: bool = False,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after_date: Optional[date] = None,
+    after_report_id: Optional[int] = None,
+    resolution: Literal["report", "week", "month"] = "report",
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Market history of one sector, newest first, optionally limited to [from, to].
+    A full page sets X-Next-After-Date (and X-Next-After-Report-Id) for the next one.
+    resolution=week|month returns the medians of each week / month (always as a fast response).
+    """
+    code = section_code.upper()
+    if resolution != "report":
+        stmt = sector_history_buckets_stmt(code, resolution, date_from, date_to, after_date, limit)
+        rows = (await db.execute(stmt)).mappings().all()
+        headers = {"X-Next-After-Date": rows[-1]["date"].isoformat()} if limit and len(rows) == limit else None
+        return fast_response(rows, headers)
+
+    stmt = sector_history_stmt(code, date_from, date_to, after_date, after_report_id, limit, fast)
     result = await db.execute(stmt)
-    return result.scalars().all()
+    rows = result.mappings().all() if fast else result.scalars().all()
+
+    headers = {}
+    if limit and len(rows) == limit:
+        last_date, last_report_id = (rows[-1]["date"], rows[-1]["report_id"]) if fast else (rows[-1].date, rows[-1].report_id)
+        headers = {"X-Next-After-Date": last_date.isoformat(), "X-Next-After-Report-Id": str(last_report_id)}
+    if fast:
+        return fast_response(rows, headers)
+    response.headers.update(headers)
+    return rows
 
 
 @app.get("/markets/scores/latest", response_model=List[SimpleScoreSchema])
+@response_cache.cached(ttl=CACHE_TTL_MARKETS)
 async def get_latest_scores_only(db: AsyncSession = Depends(get_db)):
-    subquery = select(ReportDB.id).order_by(desc(ReportDB.date)).limit(1).scalar_subquery()
+    ref = await reference_data.current()
     stmt = (
         select(SectionDB)
-        .where(SectionDB.report_id == subquery)
+        .where(SectionDB.report_id == ref.latest_report_id)
         .order_by(desc(SectionDB.safety_score))
     )
     result = await db.execute(stmt)
@@ -229,6 +638,7 @@ async def get_latest_scores_only(db: AsyncSession = Depends(get_db)):
 
 
 @app.get("/markets/scores/{section_code}", response_model=SectionSchema)
+@response_cache.cached(ttl=CACHE_TTL_MARKETS)
 async def get_single_sector_score(section_code: str, db: AsyncSession = Depends(get_db)):
     stmt = (
         select(SectionDB)
@@ -246,6 +656,7 @@ async def get_single_sector_score(section_code: str, db: AsyncSession = Depends(
     return section
 
 @app.get("/categories", response_model=List[PkdSchema])
+@response_cache.cached(ttl=CACHE_TTL_CATEGORIES)
 async def get_all_categories(db: AsyncSession = Depends(get_db)):
     stmt = select(PKD).order_by(PKD.pkd)
     result = await db.execute(stmt)
@@ -255,13 +666,18 @@ async def get_all_categories(db: AsyncSession = Depends(get_db)):
     return categories
 
 @app.get("/ceidg/scores", response_model=List[CeidgSimpleSchema])
-async def get_all_ceidg_scores(db: AsyncSession = Depends(get_db)):
+@response_cache.cached(ttl=CACHE_TTL_CEIDG)
+async def get_all_ceidg_scores(fast: bool = False, db: AsyncSession = Depends(get_db)):
+    if fast:
+        result = await db.execute(select(CeidgDB.pkd_id, CeidgDB.wskaznik))
+        return fast_response(result.mappings().all())
 
     stmt = select(CeidgDB)
     result = await db.execute(stmt)
     return result.scalars().all()
 
 @app.get("/ceidg/scores/{section_code}", response_model=CeidgSimpleSchema)
+@response_cache.cached(ttl=CACHE_TTL_CEIDG)
 async def get_ceidg_score_by_code(section_code: str, db: AsyncSession = Depends(get_db)):
 
     stmt = (
@@ -279,339 +695,850 @@ async def get_ceidg_score_by_code(section_code: str, db: AsyncSession = Depends(
     return score
 
 
-@app.get("/scores", response_model=List[CombinedScoreSchema])
-async def get_combined_scores(db: AsyncSession = Depends(get_db)):
+async def run_concurrently(*stmts, session_factory=None):
+    """
+    Executes independent read-only statements in parallel, each on its own pooled connection.
+    At most QUERY_FANOUT connections are used per call; returns the buffered rows of each statement.
+    """
+    semaphore = asyncio.Semaphore(max(1, QUERY_FANOUT))
+    session_factory = session_factory or read_session_factory()
+
+    async def run(stmt):
+        async with semaphore:
+            async with session_factory() as session:
+                result = await session.execute(stmt)
+                return result.all()
 
-    latest_report_subquery = select(ReportDB.id).order_by(desc(ReportDB.date)).limit(1).scalar_subquery()
-    res_market = await db.execute(select(SectionDB).where(SectionDB.report_id == latest_report_subquery))
-    market_map = {row.section_code: row for row in res_market.scalars().all()}
+    return await asyncio.gather(*(run(stmt) for stmt in stmts))
 
-    res_gus = await db.execute(select(GusScores, PKD).join(PKD))
-    gus_map = {row[0].pkd: row for row in res_gus.all()}
 
-    res_ceidg = await db.execute(select(CeidgDB))
-    ceidg_map = {row.pkd_id: float(row.wskaznik) for row in res_ceidg.scalars().all()}
+def rollup_avg(model=SentimentDailyDB):
+    """Average emocje over the aggregated sentiment_daily (or sentiment_total) rows"""
+    return cast(func.sum(model.emocje_sum), Float) / func.nullif(func.sum(model.emocje_count), 0)
 
 
+def source_scores(code, market_entry, gus_entry, ceidg_entry, social_values, ref):
+    """Raw per-source scores of one sector (final_score is added by the scoring engine)"""
+    social_values = [float(v) for v in social_values if v is not None]
+
+    name = "Nieznana sekcja"
+    if market_entry:
+        name = market_entry.section_name
+    elif gus_entry:
+        name = ref.pkd_names.get(code, name)
+
+    return {
+        "section_code": code,
+        "section_name": name,
+        "market_score": int(market_entry.safety_score) if market_entry else None,
+        "gus_score": float(gus_entry.wskaznik) if gus_entry else None,
+        "ceidg_score": float(ceidg_entry.wskaznik) if ceidg_entry else None,
+        "social_score": round(sum(social_values) / len(social_values), 2) if social_values else None,
+    }
+
+
+async def compute_combined_scores(session_factory=None):
+
+    ref = await reference_data.current()
+    stmt_market = select(SectionDB).where(SectionDB.report_id == ref.latest_report_id)
+    stmt_gus = select(GusScores)
+    stmt_ceidg = select(CeidgDB)
+
+    # Sumy bez podzialu na dni - obejmuja tez wpisy bez timestampu, ktorych nie ma w sentiment_daily
     stmt_yt = (
-        select(TagDB.pkd_id, func.avg(YoutubeCommentDB.emocje))
-        .join(TagDB, YoutubeCommentDB.tag_id == TagDB.id)
-        .group_by(TagDB.pkd_id)
+        select(SentimentTotalDB.pkd, rollup_avg(SentimentTotalDB))
+        .where(SentimentTotalDB.source == "youtube")
+        .group_by(SentimentTotalDB.pkd)
     )
-    res_yt = await db.execute(stmt_yt)
-    yt_rows = res_yt.all()
 
     stmt_wyk = (
-        select(TagDB.pkd_id, func.avg(WykopPostDB.emocje))
-        .join(TagDB, WykopPostDB.tag_id == TagDB.id)
-        .group_by(TagDB.pkd_id)
+        select(SentimentTotalDB.pkd, rollup_avg(SentimentTotalDB))
+        .where(SentimentTotalDB.source == "wykop")
+        .group_by(SentimentTotalDB.pkd)
     )
-    res_wyk = await db.execute(stmt_wyk)
-    wyk_rows = res_wyk.all()
-
-    social_temp = {}
 
-    for pkd, score in yt_rows:
-        if pkd and score is not None:
-            if pkd not in social_temp: social_temp[pkd] = []
-            social_temp[pkd].append(float(score))
+    market_rows, gus_rows, ceidg_rows, yt_rows, wyk_rows = await run_concurrently(
+        stmt_market, stmt_gus, stmt_ceidg, stmt_yt, stmt_wyk, session_factory=session_factory
+    )
 
-    for pkd, score in wyk_rows:
-        if pkd and score is not None:
-            if pkd not in social_temp: social_temp[pkd] = []
-            social_temp[pkd].append(float(score))
+    market_map = {row.section_code: row for (row,) in market_rows}
+    gus_map = {row.pkd: row for (row,) in gus_rows}
+    ceidg_map = {row.pkd_id: row for (row,) in ceidg_rows}
 
     social_map = {}
-    for pkd, values in social_temp.items():
-        if values:
-            social_map[pkd] = sum(values) / len(values)
+    for pkd, score in [*yt_rows, *wyk_rows]:
+        if pkd and score is not None:
+            social_map.setdefault(pkd, []).append(score)
 
     all_codes = set(market_map.keys()) | set(gus_map.keys()) | set(ceidg_map.keys()) | set(social_map.keys())
+    rows = [
+        source_scores(code, market_map.get(code), gus_map.get(code), ceidg_map.get(code), social_map.get(code, []), ref)
+        for code in all_codes
+    ]
+    return ScoreTable(rows).ranked(SCORING)
+
+
+async def get_data_version(db: AsyncSession):
+    """
+    Sum of the per-table write counters (data_version, bumped by the ingest trigger) - changes with every
+    insert, update or delete in the source tables, in the same transaction as the data
+    """
+    result = await db.execute(select(func.coalesce(func.sum(DataVersionDB.version), 0)))
+    return str(result.scalar())
+
+
+async def get_stored_data_version(db: AsyncSession):
+    """Data version of the stored snapshot (None before the first refresh)"""
+    result = await db.execute(select(CombinedScoreMetaDB.data_version))
+    return result.scalar_one_or_none()
+
+
+_scores_refresh_lock = asyncio.Lock()
+_score_table = None
+
+async def refresh_combined_scores(force=False):
+    """
+    Recomputes the combined scores and replaces the combined_score snapshot in one transaction.
+    Always runs on the primary - a lagging replica would store stale scores under a new data version.
+    On commit every worker is notified (SCORES_CHANNEL) and pushes the changes to its SSE clients.
+    Without force the rebuild is skipped when the stored snapshot already matches the source data.
+    """
+    global _score_table
+
+    async with _scores_refresh_lock, AsyncSessionLocal() as db:
+        # Serializuje przeliczenia miedzy workerami; kto czekal na blokade, widzi juz nowa wersje i nie liczy ponownie
+        await db.execute(select(func.pg_advisory_xact_lock(func.hashtext("combined_score"))))
+        version = await get_data_version(db)
+        if not force and version == await get_stored_data_version(db):
+            await db.commit()
+            rows = await load_combined_scores_snapshot()
+            _score_table = ScoreTable(rows)
+            return sorted(rows, key=lambda r: r["final_score"], reverse=True)
+
+        await reference_data.reload(AsyncSessionLocal)
+        scores = await compute_combined_scores(session_factory=AsyncSessionLocal)
+        computed_at = datetime.now()
+
+        await db.execute(CombinedScoreDB.__table__.delete())
+        if scores:
+            await db.execute(
+                CombinedScoreDB.__table__.insert(),
+                [{**row, "computed_at": computed_at} for row in scores]
+            )
+        await db.execute(
+            pg_insert(CombinedScoreMetaDB.__table__)
+            .values(id=True, data_version=version, computed_at=computed_at)
+            .on_conflict_do_update(index_elements=["id"], set_={"data_version": version, "computed_at": computed_at})
+        )
+        await db.execute(select(func.pg_notify(SCORES_CHANNEL, "")))
+        await db.commit()
+
+        invalidate_response_caches()
+        _score_table = ScoreTable([{**row, "computed_at": computed_at} for row in scores])
+        logger.info(f"Przeliczono snapshot combined_score ({len(scores)} sekcji)")
+        return [{**row, "computed_at": computed_at} for row in scores]
+
+
+async def refresh_combined_scores_if_stale():
+    """Cheap check without the lock; refresh_combined_scores() checks again under it"""
+    async with AsyncSessionLocal() as db:
+        version = await get_data_version(db)
+        stored = await get_stored_data_version(db)
+    if version != stored:
+        await refresh_combined_scores()
+
+
+async def _combined_scores_refresher():
+    while True:
+        try:
+            await refresh_combined_scores_if_stale()
+        except Exception as e:
+            logger.error(f"Błąd odświeżania combined_score: {e}")
+        await asyncio.sleep(SCORES_REFRESH_INTERVAL)
+
+
+@app.on_event("startup")
+async def start_combined_scores_refresher():
+    asyncio.create_task(_combined_scores_refresher())
+
+
+async def load_combined_scores_snapshot():
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(CombinedScoreDB.__table__))
+        return [dict(row) for row in result.mappings()]
+
+
+# Cache'owane odpowiedzi zalezne od tabeli z powiadomienia. /scores czyta snapshot - czysci go przeliczenie
+INGEST_CACHE_PREFIXES = {
+    "report": ("/markets",),
+    "section": ("/markets",),
+    "ceidg": ("/ceidg",),
+    "pkd": ("/categories", "/markets"),
+    "tag": (),
+    "gus": (),
+    "komentarz_youtube": (),
+    "post_wykop": (),
+}
+
+
+def on_ingest_notified(table):
+    """
+    Called for every ingest NOTIFY, before the debounced snapshot refresh. Cached bodies built from the
+    changed table are dropped together with the ETag version bump, so a new ETag never labels an old body.
+    """
+    prefixes = INGEST_CACHE_PREFIXES.get(table)
+    if prefixes is None:
+        response_cache.invalidate()
+    else:
+        for prefix in prefixes:
+            response_cache.invalidate(prefix)
+    reference_data.invalidate()
+    response_versions.invalidate()
+
+
+score_broadcaster = ScoreBroadcaster(
+    DB_LISTEN_DSN,
+    load_snapshot=load_combined_scores_snapshot,
+    on_ingest=refresh_combined_scores_if_stale,
+    on_scores_changed=invalidate_response_caches,
+    debounce=SCORES_EVENTS_DEBOUNCE,
+    queue_size=SSE_QUEUE_SIZE,
+    on_ingest_notified=on_ingest_notified,
+)
+
+
+@app.on_event("startup")
+async def start_score_broadcaster():
+    asyncio.create_task(score_broadcaster.run())
+
 
-    final_results = []
-
-    for code in all_codes:
-        valid_values = []
-
-        m_score, g_score, c_score, s_score = None, None, None, None
-        section_name = "Nieznana sekcja"
-
-        if code in market_map:
-            item = market_map[code]
-            val = float(item.safety_score)
-            m_score = int(val)
-            valid_values.append(val)
-            section_name = item.section_name
-
-        if code in gus_map:
-            item, pkd_info = gus_map[code]
-            val = float(item.wskaznik)
-            g_score = val
-            valid_values.append(val)
-            if section_name == "Nieznana sekcja":
-                section_name = pkd_info.nazwa
-
-        if code in ceidg_map:
-            val = ceidg_map[code]
-            c_score = val
-            valid_values.append(val)
-
-        if code in social_map:
-            val = social_map[code]
-            s_score = round(val, 2)
-            valid_values.append(val)
-
-        if valid_values:
-            final_val = sum(valid_values) / len(valid_values)
+@app.get("/scores", response_model=List[CombinedScoreSchema])
+@response_cache.cached(ttl=CACHE_TTL_SCORES)
+async def get_combined_scores(db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(CombinedScoreDB).order_by(desc(CombinedScoreDB.final_score)))
+    snapshot = result.scalars().all()
+
+    if not snapshot:
+        return await refresh_combined_scores()
+
+    return snapshot
+
+
+@app.post("/scores/refresh", response_model=List[CombinedScoreSchema], dependencies=[Depends(require_admin)])
+async def force_refresh_combined_scores():
+    return await refresh_combined_scores(force=True)
+
+
+async def current_score_table():
+    """Source scores of the stored snapshot as a ScoreTable, kept in memory until the next refresh"""
+    global _score_table
+    if _score_table is None:
+        rows = await load_combined_scores_snapshot()
+        if not rows:
+            await refresh_combined_scores()
         else:
-            final_val = 0.0
+            _score_table = ScoreTable(rows)
+    return _score_table
 
-        final_results.append({
-            "section_code": code,
-            "section_name": section_name,
-            "market_score": m_score,
-            "gus_score": g_score,
-            "ceidg_score": c_score,
-            "social_score": s_score,
-            "final_score": round(final_val, 2)
-        })
 
-    final_results.sort(key=lambda x: x["final_score"], reverse=True)
-    return final_results
+@app.post("/scores/what-if", response_model=List[CombinedScoreSchema])
+async def what_if_scores(scenario: ScoringScenarioSchema):
+    """Re-ranks the current snapshot with other source weights / normalization - no queries to the sources"""
+    try:
+        config = ScoringConfig(scenario.weights, scenario.normalization)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
+    table = await current_score_table()
+    return table.ranked(config)
 
-@app.get("/scores/{section_code}", response_model=CombinedScoreSchema)
-async def get_combined_score_by_code(section_code: str, db: AsyncSession = Depends(get_db)):
-    code = section_code.upper()
 
-    latest_sub = select(ReportDB.id).order_by(desc(ReportDB.date)).limit(1).scalar_subquery()
-    res_m = await db.execute(select(SectionDB).where(SectionDB.report_id == latest_sub, SectionDB.section_code == code))
-    market_entry = res_m.scalars().first()
+@app.get("/scores/config")
+async def get_scoring_config():
+    return SCORING.as_dict()
+
+
+@app.get("/scores/stream")
+async def stream_combined_scores():
+    """
+    Server-Sent Events: a "snapshot" event with all scores on connect, then a "diff" event
+    ({"changed": [...], "removed": [...]}) whenever new data changes the snapshot.
+    """
+    queue = await score_broadcaster.subscribe()
+    return StreamingResponse(
+        score_broadcaster.stream(queue, SSE_HEARTBEAT),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
-    res_g = await db.execute(select(GusScores, PKD).join(PKD).where(GusScores.pkd == code))
-    gus_entry = res_g.first()
+@app.get("/admin/pool/stats", dependencies=[Depends(require_admin)])
+async def get_pool_stats():
+    """Per-process pool statistics - with several uvicorn workers each one reports its own pool"""
+    return engine.pool.stats()
 
-    res_c = await db.execute(select(CeidgDB).where(CeidgDB.pkd_id == code))
-    ceidg_entry = res_c.scalars().first()
 
-    tags_subquery = select(TagDB.id).where(TagDB.pkd_id == code)
+@app.get("/admin/replicas", dependencies=[Depends(require_admin)])
+async def get_replica_stats():
+    return replica_router.stats()
 
-    res_yt = await db.execute(
-        select(func.avg(YoutubeCommentDB.emocje)).where(YoutubeCommentDB.tag_id.in_(tags_subquery)))
-    yt_avg = res_yt.scalar()
 
-    res_wyk = await db.execute(select(func.avg(WykopPostDB.emocje)).where(WykopPostDB.tag_id.in_(tags_subquery)))
-    wyk_avg = res_wyk.scalar()
+@app.get("/admin/events", dependencies=[Depends(require_admin)])
+async def get_event_stats():
+    return score_broadcaster.stats()
 
-    social_vals = []
-    if yt_avg is not None: social_vals.append(yt_avg)
-    if wyk_avg is not None: social_vals.append(wyk_avg)
 
-    social_score = sum(social_vals) / len(social_vals) if social_vals else None
+@app.get("/admin/reference", dependencies=[Depends(require_admin)])
+async def get_reference_stats():
+    return reference_data.stats()
 
-    if not any([market_entry, gus_entry, ceidg_entry, social_score is not None]):
+
+@app.get("/admin/cache/stats", dependencies=[Depends(require_admin)])
+async def get_cache_stats():
+    return response_cache.stats()
+
+
+@app.post("/admin/cache/invalidate", dependencies=[Depends(require_admin)])
+async def invalidate_cache(prefix: Optional[str] = None):
+    """Call after an ingestion run; prefix (e.g. /markets) limits which entries are dropped"""
+    removed = response_cache.invalidate(prefix)
+    response_versions.invalidate()
+    return {"removed": removed, **response_cache.stats()}
+
+
+async def compute_combined_score_by_code(code: str):
+
+    ref = await reference_data.current()
+
+    res_m, res_g, res_c, res_yt, res_wyk = await run_concurrently(
+        select(SectionDB).where(SectionDB.report_id == ref.latest_report_id, SectionDB.section_code == code),
+        select(GusScores).where(GusScores.pkd == code),
+        select(CeidgDB).where(CeidgDB.pkd_id == code),
+        select(rollup_avg(SentimentTotalDB)).where(SentimentTotalDB.pkd == code, SentimentTotalDB.source == "youtube"),
+        select(rollup_avg(SentimentTotalDB)).where(SentimentTotalDB.pkd == code, SentimentTotalDB.source == "wykop")
+    )
+
+    market_entry = res_m[0][0] if res_m else None
+    gus_entry = res_g[0][0] if res_g else None
+    ceidg_entry = res_c[0][0] if res_c else None
+
+    row = source_scores(code, market_entry, gus_entry, ceidg_entry, [res_yt[0][0], res_wyk[0][0]], ref)
+    if all(row[column] is None for column in SOURCE_COLUMNS):
         raise HTTPException(status_code=404, detail="Brak danych dla tego sektora")
 
-    valid_values = []
+    if SCORING.normalization == "none":
+        return ScoreTable([row]).ranked(SCORING)[0]
 
-    m_val = None
-    if market_entry:
-        val = float(market_entry.safety_score)
-        m_val = int(val)
-        valid_values.append(val)
-
-    g_val = None
-    if gus_entry:
-        val = float(gus_entry[0].wskaznik)
-        g_val = val
-        valid_values.append(val)
-
-    c_val = None
-    if ceidg_entry:
-        val = float(ceidg_entry.wskaznik)
-        c_val = val
-        valid_values.append(val)
-
-    s_val = None
-    if social_score is not None:
-        s_val = float(social_score)
-        valid_values.append(s_val)
-
-    name = "Nieznana"
-    if market_entry:
-        name = market_entry.section_name
-    elif gus_entry:
-        name = gus_entry[1].nazwa
+    # Normalizacja zalezy od pozostalych sekcji - liczona razem z aktualnym snapshotem
+    table = await current_score_table()
+    others = [r for r in table.rows if r["section_code"] != code]
+    return next(r for r in ScoreTable(others + [row]).ranked(SCORING) if r["section_code"] == code)
 
-    final = sum(valid_values) / len(valid_values) if valid_values else 0.0
 
-    return {
-        "section_code": code,
-        "section_name": name,
-        "market_score": m_val,
-        "gus_score": g_val,
-        "ceidg_score": c_val,
-        "social_score": round(s_val, 2) if s_val else None,
-        "final_score": round(final, 2)
-    }
+@app.get("/scores/{section_code}", response_model=CombinedScoreSchema)
+@response_cache.cached(ttl=CACHE_TTL_SCORES)
+async def get_combined_score_by_code(section_code: str, db: AsyncSession = Depends(get_db)):
+    code = section_code.upper()
+
+    snapshot = await db.get(CombinedScoreDB, code)
+    if snapshot:
+        return snapshot
+
+    # Sekcja, ktora pojawila sie po ostatnim przeliczeniu snapshotu
+    return await compute_combined_score_by_code(code)
+
+def day_bucket(column, resolution):
+    """Day of a date/timestamp column, or the first day of its week / month"""
+    if resolution == "day":
+        return cast(column, Date)
+    # Literal zamiast parametru - ten sam tekst wyrazenia w SELECT i GROUP BY
+    return cast(func.date_trunc(literal_column(f"'{resolution}'"), column), Date)
+
+
+def downsample_series(series, max_points):
+    """LTTB over one {date: value} series"""
+    points = lttb([(d.toordinal(), v) for d, v in sorted(series.items())], max_points)
+    return {date.fromordinal(x): v for x, v in points}
+
 
 @app.get("/charts/history/{section_code}", response_model=List[HistoryPoint])
-async def get_history_charts(section_code: str, days: int = 90, db: AsyncSession = Depends(get_db)):
+async def get_history_charts(
+    section_code: str,
+    days: int = 90,
+    resolution: Literal["day", "week", "month"] = "day",
+    max_points: Optional[int] = Query(None, ge=3, le=MAX_CHART_POINTS),
+):
+    """
+    Daily series per source; resolution=week|month averages them per week / month in SQL
+    (the date is the first day of the bucket), max_points thins every series with LTTB.
+    """
     code = section_code.upper()
     start_date = date.today() - timedelta(days=days)
 
-    # Helper for date grouping
-    def daily_avg(model, date_col, value_col):
+    # Helper for the sentiment rollup - sums over the bucket, so the average stays weighted by comment count
+    def social(source):
+        # Grouping by the expression: GROUP BY day would bind to sentiment_daily.day, not the bucket
+        bucket = day_bucket(SentimentDailyDB.day, resolution)
         return (
-            select(cast(date_col, Date).label('day'), func.avg(value_col))
-            .where(date_col >= start_date)
-            .group_by('day')
-            .order_by('day')
+            select(bucket.label('day'), rollup_avg())
+            .where(
+                SentimentDailyDB.pkd == code,
+                SentimentDailyDB.source == source,
+                SentimentDailyDB.day >= start_date
+            )
+            .group_by(bucket)
         )
 
     # 1. Wykop
-    tags_sub = select(TagDB.id).where(TagDB.pkd_id == code)
-    stmt_wykop = (
-        select(cast(WykopPostDB.timestamp, Date).label('day'), func.avg(WykopPostDB.emocje))
-        .where(WykopPostDB.tag_id.in_(tags_sub), WykopPostDB.timestamp >= start_date)
-        .group_by('day')
-    )
-    res_wykop = await db.execute(stmt_wykop)
-    wykop_data = {row[0]: row[1] for row in res_wykop.all()}
+    stmt_wykop = social("wykop")
 
     # 2. Youtube
-    stmt_yt = (
-        select(cast(YoutubeCommentDB.timestamp, Date).label('day'), func.avg(YoutubeCommentDB.emocje))
-        .where(YoutubeCommentDB.tag_id.in_(tags_sub), YoutubeCommentDB.timestamp >= start_date)
-        .group_by('day')
-    )
-    res_yt = await db.execute(stmt_yt)
-    yt_data = {row[0]: row[1] for row in res_yt.all()}
+    stmt_yt = social("youtube")
 
     # 3. CEIDG
+    ceidg_bucket = day_bucket(CeidgDB.utworzono, resolution)
     stmt_ceidg = (
-        select(cast(CeidgDB.utworzono, Date).label('day'), func.avg(CeidgDB.wskaznik))
+        select(ceidg_bucket.label('day'), func.avg(CeidgDB.wskaznik))
         .where(CeidgDB.pkd_id == code, CeidgDB.utworzono >= start_date)
-        .group_by('day')
+        .group_by(ceidg_bucket)
     )
-    res_ceidg = await db.execute(stmt_ceidg)
-    ceidg_data = {row[0]: float(row[1]) for row in res_ceidg.all()}
 
     # 4. GUS
+    gus_bucket = day_bucket(GusScores.timestamp, resolution)
     stmt_gus = (
-        select(cast(GusScores.timestamp, Date).label('day'), func.avg(GusScores.wskaznik))
+        select(gus_bucket.label('day'), func.avg(GusScores.wskaznik))
         .where(GusScores.pkd == code, GusScores.timestamp >= start_date)
-        .group_by('day')
+        .group_by(gus_bucket)
     )
-    res_gus = await db.execute(stmt_gus)
-    # Gus keys might be date or string depending on driver, assuming date object
-    gus_data = {row[0]: float(row[1]) for row in res_gus.all()}
+
+    res_wykop, res_yt, res_ceidg, res_gus = await run_concurrently(stmt_wykop, stmt_yt, stmt_ceidg, stmt_gus)
+    series = {
+        "wykop": {row[0]: row[1] for row in res_wykop if row[1] is not None},
+        "youtube": {row[0]: row[1] for row in res_yt if row[1] is not None},
+        "ceidg": {row[0]: float(row[1]) for row in res_ceidg},
+        # Gus keys might be date or string depending on driver, assuming date object
+        "gus": {row[0]: float(row[1]) for row in res_gus},
+    }
+    if max_points:
+        series = {source: downsample_series(values, max_points) for source, values in series.items()}
 
     # Merge
-    all_dates = set(wykop_data.keys()) | set(yt_data.keys()) | set(ceidg_data.keys()) | set(gus_data.keys())
-    sorted_dates = sorted(list(all_dates))
+    all_dates = set().union(*(values.keys() for values in series.values()))
 
     result = []
-    for d in sorted_dates:
-        result.append({
-            "date": d,
-            "wykop": wykop_data.get(d),
-            "youtube": yt_data.get(d),
-            "ceidg": ceidg_data.get(d),
-            "gus": gus_data.get(d)
-        })
+    for d in sorted(all_dates):
+        result.append({"date": d, **{source: values.get(d) for source, values in series.items()}})
 
     return result
 
+YOUTUBE_COLUMNS = (
+    YoutubeCommentDB.id, YoutubeCommentDB.komentarz, YoutubeCommentDB.tag_id,
+    YoutubeCommentDB.timestamp, YoutubeCommentDB.emocje
+)
+WYKOP_COLUMNS = (
+    WykopPostDB.id, WykopPostDB.tag_id, WykopPostDB.post,
+    WykopPostDB.timestamp, WykopPostDB.emocje
+)
+
+
+def paginate_by_id(stmt, model, after_id, limit):
+    if after_id is not None:
+        stmt = stmt.where(model.id > after_id)
+    stmt = stmt.order_by(model.id)
+    return stmt.limit(limit) if limit else stmt
+
+
+def sector_comments_stmt(model, tag_ids, after_id=None, after_timestamp=None, limit=None):
+    """Comments of the given tags (ReferenceData.tags_for) as a keyset page"""
+    columns = YOUTUBE_COLUMNS if model is YoutubeCommentDB else WYKOP_COLUMNS
+    stmt = select(*columns).where(model.tag_id.in_(tag_ids))
+    return paginate_by_timestamp(stmt, model, after_id, after_timestamp, limit)
+
+
+def paginate_by_timestamp(stmt, model, after_id, after_timestamp, limit):
+    """Keyset over (timestamp DESC NULLS LAST, id DESC) - rows without a timestamp come last"""
+    if after_timestamp is not None:
+        older = model.timestamp < after_timestamp
+        if after_id is not None:
+            older = or_(older, and_(model.timestamp == after_timestamp, model.id < after_id))
+        stmt = stmt.where(or_(older, model.timestamp.is_(None)))
+    elif after_id is not None:
+        stmt = stmt.where(model.timestamp.is_(None), model.id < after_id)
+    stmt = stmt.order_by(desc(model.timestamp).nulls_last(), desc(model.id))
+    return stmt.limit(limit) if limit else stmt
+
+
+def next_cursor_headers(rows, limit, with_timestamp=False):
+    """Full page -> the client continues with ?after_id=...(&after_timestamp=...)"""
+    if not limit or len(rows) < limit:
+        return {}
+    last = rows[-1]
+    headers = {"X-Next-After-Id": str(last["id"])}
+    if with_timestamp and last["timestamp"] is not None:
+        headers["X-Next-After-Timestamp"] = last["timestamp"].isoformat()
+    return headers
+
+
+def comments_response(response: Response, rows, headers, fast):
+    if fast:
+        return fast_response(rows, headers)
+    response.headers.update(headers)
+    return rows
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Nie można zserializować {type(value)}")
+
+
+def ndjson_response(stmt):
+    """Streams rows from a server-side cursor as newline-delimited JSON in constant memory"""
+    async def rows():
+        # Sesja otwierana w generatorze - zaleznosc get_db jest zamykana przed wyslaniem odpowiedzi
+        async with read_session_factory()() as session:
+            result = await session.stream(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+            async for partition in result.mappings().partitions():
+                yield "".join(
+                    json.dumps(dict(row), default=_json_default, ensure_ascii=False) + "\n"
+                    for row in partition
+                )
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+
 @app.get("/komentarz_youtube")
-async def get_all_youtube_comments(db: AsyncSession = Depends(get_db)):
+async def get_all_youtube_comments(
+    response: Response,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+    fast: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
     """
-    Returns all rows from komentarz_youtube (YoutubeCommentDB)
+    Returns rows from komentarz_youtube (YoutubeCommentDB) ordered by id.
+    With limit the next page starts at X-Next-After-Id, stream=true returns NDJSON, fast=true uses orjson.
     """
-    result = await db.execute(select(YoutubeCommentDB))
-    rows = result.scalars().all()
+    stmt = paginate_by_id(select(*YOUTUBE_COLUMNS), YoutubeCommentDB, after_id, limit)
+    if stream:
+        return ndjson_response(stmt)
 
-    if not rows:
+    result = await db.execute(stmt)
+    rows = result.mappings().all()
+
+    if not rows and after_id is None:
         raise HTTPException(status_code=404, detail="Brak danych w komentarz_youtube")
 
-    return [
-        {
-            "id": r.id,
-            "komentarz": r.komentarz,
-            "tag_id": r.tag_id,
-            "timestamp": r.timestamp,
-            "emocje": r.emocje
-        }
-        for r in rows
-    ]
+    headers = next_cursor_headers(rows, limit)
+    return comments_response(response, rows, headers, fast)
 
 @app.get("/komentarz_youtube/{section_code}")
-async def get_youtube_comments_by_sector(section_code: str, db: AsyncSession = Depends(get_db)):
+async def get_youtube_comments_by_sector(
+    section_code: str,
+    response: Response,
+    after_id: Optional[int] = None,
+    after_timestamp: Optional[datetime] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+    fast: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
     code = section_code.upper()
-    tags_sub = select(TagDB.id).where(TagDB.pkd_id == code)
-    
-    stmt = select(YoutubeCommentDB).where(YoutubeCommentDB.tag_id.in_(tags_sub)).order_by(desc(YoutubeCommentDB.timestamp))
+    ref = await reference_data.current()
+
+    stmt = sector_comments_stmt(YoutubeCommentDB, ref.tags_for(code), after_id, after_timestamp, limit)
+    if stream:
+        return ndjson_response(stmt)
+
     result = await db.execute(stmt)
-    rows = result.scalars().all()
-
-    if not rows:
-        return []
-
-    return [
-        {
-            "id": r.id,
-            "komentarz": r.komentarz,
-            "tag_id": r.tag_id,
-            "timestamp": r.timestamp,
-            "emocje": r.emocje
-        }
-        for r in rows
-    ]
+    rows = result.mappings().all()
+
+    headers = next_cursor_headers(rows, limit, with_timestamp=True)
+    return comments_response(response, rows, headers, fast)
 
 @app.get("/post_wykop")
-async def get_all_wykop_comments(db: AsyncSession = Depends(get_db)):
+async def get_all_wykop_comments(
+    response: Response,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+    fast: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
     """
-    Returns all rows from post_wykop (WykopPostDB)
+    Returns rows from post_wykop (WykopPostDB) ordered by id.
+    With limit the next page starts at X-Next-After-Id, stream=true returns NDJSON, fast=true uses orjson.
     """
-    result = await db.execute(select(WykopPostDB))
-    rows = result.scalars().all()
+    stmt = paginate_by_id(select(*WYKOP_COLUMNS), WykopPostDB, after_id, limit)
+    if stream:
+        return ndjson_response(stmt)
+
+    result = await db.execute(stmt)
+    rows = result.mappings().all()
 
-    if not rows:
+    if not rows and after_id is None:
         raise HTTPException(status_code=404, detail="Brak danych w post_wykop")
 
-    return [
-        {
-            "id": r.id,
-            "tag_id": r.tag_id,
-            "post": r.post,
-            "timestamp": r.timestamp,
-            "emocje": r.emocje
-        }
-        for r in rows
-    ]
+    headers = next_cursor_headers(rows, limit)
+    return comments_response(response, rows, headers, fast)
 
 @app.get("/post_wykop/{section_code}")
-async def get_wykop_comments_by_sector(section_code: str, db: AsyncSession = Depends(get_db)):
+async def get_wykop_comments_by_sector(
+    section_code: str,
+    response: Response,
+    after_id: Optional[int] = None,
+    after_timestamp: Optional[datetime] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+    fast: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
     code = section_code.upper()
-    tags_sub = select(TagDB.id).where(TagDB.pkd_id == code)
+    ref = await reference_data.current()
+
+    stmt = sector_comments_stmt(WykopPostDB, ref.tags_for(code), after_id, after_timestamp, limit)
+    if stream:
+        return ndjson_response(stmt)
 
-    stmt = select(WykopPostDB).where(WykopPostDB.tag_id.in_(tags_sub)).order_by(desc(WykopPostDB.timestamp))
     result = await db.execute(stmt)
-    rows = result.scalars().all()
-
-    if not rows:
-        return []
-
-    return [
-        {
-            "id": r.id,
-            "tag_id": r.tag_id,
-            "post": r.post,
-            "timestamp": r.timestamp,
-            "emocje": r.emocje
-        }
-        for r in rows
-    ]
+    rows = result.mappings().all()
+
+    headers = next_cursor_headers(rows, limit, with_timestamp=True)
+    return comments_response(response, rows, headers, fast)
+
+SEARCH_SOURCES = {
+    "youtube": (YoutubeCommentDB, YoutubeCommentDB.komentarz),
+    "wykop": (WykopPostDB, WykopPostDB.post),
+}
+SNIPPET_OPTIONS = "MaxFragments=2, MaxWords=20, MinWords=5, FragmentDelimiter= ... , StartSel=<b>, StopSel=</b>"
+
+
+def search_config():
+    return literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+
+
+def search_candidates_stmt(source, query, tag_ids=None, date_from=None, date_to=None):
+    """
+    Matches of one source found through the GIN index on search_tsv. Only the newest
+    SEARCH_MAX_CANDIDATES are ranked, so a very common word does not rank the whole table.
+    """
+    model, text_column = SEARCH_SOURCES[source]
+    stmt = (
+        select(
+            literal_column(f"'{source}'").label("source"), model.id, model.tag_id, model.timestamp,
+            model.emocje, text_column.label("text"), func.ts_rank_cd(model.search_tsv, query).label("rank")
+        )
+        .where(model.search_tsv.op("@@")(query), *date_range_filter(model.timestamp, date_from, date_to))
+        .order_by(desc(model.id))
+        .limit(SEARCH_MAX_CANDIDATES)
+    )
+    if tag_ids is not None:
+        stmt = stmt.where(model.tag_id.in_(tag_ids))
+    return stmt
+
+
+@app.get("/search/comments", response_model=List[SearchHitSchema])
+async def search_comments(
+    response: Response,
+    q: str = Query(..., min_length=2, max_length=200),
+    source: Literal["all", "youtube", "wykop"] = "all",
+    sections: Optional[str] = None,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    limit: int = Query(20, ge=1, le=SEARCH_MAX_PAGE),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Ranked full-text search over YouTube comments and Wykop posts (websearch syntax: "fraza", -słowo, or).
+    Snippets mark matches with <b></b>; a full page sets X-Next-Offset.
+    """
+    query = func.websearch_to_tsquery(search_config(), q)
+    codes = parse_sections(sections)
+    tag_ids = (await reference_data.current()).tags_for(*codes) if codes else None
+    sources = list(SEARCH_SOURCES) if source == "all" else [source]
+
+    candidates = [search_candidates_stmt(name, query, tag_ids, date_from, date_to) for name in sources]
+    hits = (candidates[0] if len(candidates) == 1 else union_all(*candidates)).subquery("hits")
+    page = (
+        select(hits)
+        .order_by(desc(hits.c.rank), desc(hits.c.id), hits.c.source)
+        .limit(limit)
+        .offset(offset)
+        .subquery("page")
+    )
+    # ts_headline jest kosztowny - liczony tylko dla wierszy zwracanej strony
+    stmt = (
+        select(
+            page.c.source, page.c.id, TagDB.pkd_id.label("section_code"), page.c.tag_id, page.c.timestamp,
+            page.c.emocje, page.c.rank,
+            func.ts_headline(search_config(), func.coalesce(page.c.text, ""), query, SNIPPET_OPTIONS).label("snippet")
+        )
+        .outerjoin(TagDB, page.c.tag_id == TagDB.id)
+        .order_by(desc(page.c.rank), desc(page.c.id), page.c.source)
+    )
+    rows = (await db.execute(stmt)).mappings().all()
+
+    if len(rows) == limit:
+        response.headers["X-Next-Offset"] = str(offset + limit)
+    return rows
+
+
+ExportFormat = Literal["parquet", "arrow"]
+
+
+def parse_sections(sections: Optional[str]):
+    """'f,G' -> ['F', 'G'], empty -> None (all sections)"""
+    if not sections:
+        return None
+    return [code.strip().upper() for code in sections.split(",") if code.strip()]
+
+
+def date_range_filter(column, date_from, date_to):
+    """Inclusive [date_from, date_to] on a date or timestamp column"""
+    conditions = []
+    if date_from is not None:
+        conditions.append(column >= date_from)
+    if date_to is not None:
+        conditions.append(column < date_to + timedelta(days=1))
+    return conditions
+
+
+def export_response(stmt, schema, fmt, name):
+    """Streams the statement as Parquet or Arrow IPC, one row group / record batch per EXPORT_BATCH_SIZE rows"""
+    async def partitions():
+        async with read_session_factory()() as session:
+            result = await session.stream(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+            async for partition in result.mappings().partitions():
+                yield [dict(row) for row in partition]
+
+    filename = f"{name}.{exports.EXTENSIONS[fmt]}"
+    return StreamingResponse(
+        exports.arrow_stream(partitions(), schema, fmt),
+        media_type=exports.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@app.get("/export/markets/sectors")
+async def export_sector_history(
+    format: ExportFormat = "parquet",
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    sections: Optional[str] = None,
+):
+    """Section rows of every report (as in /markets/sectors/{code}) with the report date, ordered by date"""
+    stmt = (
+        select(
+            ReportDB.date, SectionDB.report_id, SectionDB.section_code, SectionDB.section_name,
+            SectionDB.safety_score, SectionDB.rating, SectionDB.median_margin, SectionDB.median_roe,
+            SectionDB.median_pe, SectionDB.median_divident_yield, SectionDB.companies_count,
+            SectionDB.total_cap_pln
+        )
+        .join(ReportDB, SectionDB.report_id == ReportDB.id)
+        .where(*date_range_filter(ReportDB.date, date_from, date_to))
+        .order_by(ReportDB.date, SectionDB.section_code)
+    )
+    codes = parse_sections(sections)
+    if codes:
+        stmt = stmt.where(SectionDB.section_code.in_(codes))
+    return export_response(stmt, exports.SECTION_SCHEMA, format, "sectors")
+
+
+@app.get("/export/charts/history")
+async def export_history_charts(
+    format: ExportFormat = "parquet",
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    sections: Optional[str] = None,
+):
+    """Daily wykop/youtube/ceidg/gus series of /charts/history/{code} for many sections at once"""
+    codes = parse_sections(sections)
+
+    social = (
+        select(
+            SentimentDailyDB.pkd.label("section_code"), SentimentDailyDB.day.label("date"),
+            SentimentDailyDB.source.label("source"), rollup_avg().label("value")
+        )
+        .where(*date_range_filter(SentimentDailyDB.day, date_from, date_to))
+        .group_by(SentimentDailyDB.pkd, SentimentDailyDB.day, SentimentDailyDB.source)
+    )
+    ceidg_day = cast(CeidgDB.utworzono, Date)
+    ceidg = (
+        select(
+            CeidgDB.pkd_id, ceidg_day, literal_column("'ceidg'"),
+            cast(func.avg(CeidgDB.wskaznik), Float)
+        )
+        .where(*date_range_filter(CeidgDB.utworzono, date_from, date_to))
+        .group_by(CeidgDB.pkd_id, ceidg_day)
+    )
+    gus_day = cast(GusScores.timestamp, Date)
+    gus = (
+        select(
+            GusScores.pkd, gus_day, literal_column("'gus'"),
+            cast(func.avg(GusScores.wskaznik), Float)
+        )
+        .where(*date_range_filter(GusScores.timestamp, date_from, date_to))
+        .group_by(GusScores.pkd, gus_day)
+    )
+    if codes:
+        social = social.where(SentimentDailyDB.pkd.in_(codes))
+        ceidg = ceidg.where(CeidgDB.pkd_id.in_(codes))
+        gus = gus.where(GusScores.pkd.in_(codes))
+
+    # Jeden wiersz na (sekcja, dzien), zrodla jako kolumny - ten sam ksztalt co /charts/history
+    series = union_all(social, ceidg, gus).subquery()
+    stmt = (
+        select(
+            series.c.section_code, series.c.date,
+            *(func.max(series.c.value).filter(series.c.source == source).label(source)
+              for source in ("wykop", "youtube", "ceidg", "gus"))
+        )
+        .group_by(series.c.section_code, series.c.date)
+        .order_by(series.c.section_code, series.c.date)
+    )
+    return export_response(stmt, exports.HISTORY_SCHEMA, format, "history")
+
+
+def comments_export_stmt(model, text_column, date_from, date_to, sections):
+    stmt = (
+        select(
+            model.id, TagDB.pkd_id.label("section_code"), model.tag_id,
+            model.timestamp, model.emocje, text_column
+        )
+        .outerjoin(TagDB, model.tag_id == TagDB.id)
+        .where(*date_range_filter(model.timestamp, date_from, date_to))
+        .order_by(model.id)
+    )
+    codes = parse_sections(sections)
+    if codes:
+        stmt = stmt.where(TagDB.pkd_id.in_(codes))
+    return stmt
+
+
+@app.get("/export/komentarz_youtube")
+async def export_youtube_comments(
+    format: ExportFormat = "parquet",
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    sections: Optional[str] = None,
+):
+    stmt = comments_export_stmt(YoutubeCommentDB, YoutubeCommentDB.komentarz, date_from, date_to, sections)
+    return export_response(stmt, exports.YOUTUBE_SCHEMA, format, "komentarz_youtube")
+
+
+@app.get("/export/post_wykop")
+async def export_wykop_comments(
+    format: ExportFormat = "parquet",
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    sections: Optional[str] = None,
+):
+    stmt = comments_export_stmt(WykopPostDB, WykopPostDB.post, date_from, date_to, sections)
+    return export_response(stmt, exports.WYKOP_SCHEMA, format, "post_wykop")
 
 if __name__ == "__main__":
     uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
@@ -0,0 +1,99 @@
+import functools
+import hashlib
+import logging
+import re
+import time
+
+from fastapi import FastAPI, Request, Response
+from prometheus_client import CONTENT_TYPE_LATEST, Gauge, Histogram, generate_latest
+from sqlalchemy import event
+
+logger = logging.getLogger("meluzyna.sql")
+
+REQUEST_LATENCY = Histogram(
+    "meluzyna_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "meluzyna_http_requests_in_flight",
+    "HTTP requests currently being handled",
+)
+DB_QUERY_LATENCY = Histogram(
+    "meluzyna_db_query_duration_seconds",
+    "SQL statement execution time by statement fingerprint",
+    ["fingerprint", "operation"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\$\d+|%\(\w+\)s|\b\d+(?:\.\d+)?\b")
+# asyncpg kompiluje parametry jako $1::INTEGER - bez rzutowan lista IN zwija sie do jednego (?)
+_CASTS = re.compile(
+    r"::[A-Za-z_]\w*(?:\s+(?:PRECISION|VARYING|WITH(?:OUT)?\s+TIME\s+ZONE))?(?:\s*\(\s*\?(?:\s*,\s*\?)?\s*\))?(?:\[\])*",
+    re.IGNORECASE,
+)
+_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+_logged_fingerprints = set()
+
+
+@functools.lru_cache(maxsize=2048)
+def fingerprint(statement):
+    """Normalizes literals/bind params so that executions of the same query share one label"""
+    normalized = _WHITESPACE.sub(" ", _LITERALS.sub("?", statement)).strip()
+    normalized = _IN_LISTS.sub("(?)", _CASTS.sub("", normalized))
+    digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12]
+    if digest not in _logged_fingerprints:
+        # Tekst zapytania w logu, nie w etykiecie metryki - etykiety maja miec ograniczona liczbe wartosci
+        _logged_fingerprints.add(digest)
+        logger.info(f"Zapytanie [{digest}]: {normalized[:1000]}")
+    return digest, normalized
+
+
+def instrument_engine(engine, slow_query_ms):
+    """Times every cursor execution of the (sync side of the) engine and logs slow statements"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        digest, normalized = fingerprint(statement)
+        operation = normalized.split(" ", 1)[0].upper()
+        DB_QUERY_LATENCY.labels(digest, operation).observe(elapsed)
+
+        if slow_query_ms and elapsed * 1000 >= slow_query_ms:
+            logger.warning(f"Wolne zapytanie {elapsed * 1000:.1f} ms [{digest}]: {normalized[:1000]}")
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(context):
+        # Zapytanie zakonczone bledem nie wywola after_cursor_execute
+        starts = context.connection.info.get("query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+
+def install(app: FastAPI):
+    """Adds the latency/in-flight middleware and the /metrics endpoint"""
+
+    @app.middleware("http")
+    async def track_requests(request: Request, call_next):
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            route = request.scope.get("route")
+            # Szablon sciezki (/scores/{section_code}), nie konkretny URL - ograniczona liczba etykiet
+            template = route.path if route is not None else "unmatched"
+            REQUEST_LATENCY.labels(request.method, template, str(status)).observe(time.perf_counter() - start)
+
+    @app.get("/metrics", include_in_schema=False)
+    def get_metrics():
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
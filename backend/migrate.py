@@ -0,0 +1,168 @@
+"""
+Prosty system migracji schematu bazy.
+
+Migracje to pliki backend/migrations/NNNN_opis.sql wykonywane w kolejnosci numerow.
+Kazda zastosowana migracja jest zapisywana w tabeli schema_migrations razem z suma kontrolna,
+wiec ponowne uruchomienie pomija juz wykonane pliki, a zmiana juz wykonanego pliku jest bledem.
+Plik zaczynajacy sie od linii "-- migrate: no-transaction" jest wykonywany poza transakcja
+(wymagane np. przez CREATE INDEX CONCURRENTLY).
+
+    python migrate.py            # wykonuje oczekujace migracje
+    python migrate.py --status   # pokazuje stan migracji
+"""
+import argparse
+import glob
+import hashlib
+import logging
+import os
+import re
+import sys
+
+import psycopg2
+
+DB_CONFIG = {
+    "host": os.getenv("DB_HOST", "212.132.76.195"),
+    "port": os.getenv("DB_PORT", os.getenv("DATABASE_PORT", "5433")),
+    "dbname": os.getenv("DB_NAME", "hacknation_db"),
+    "user": os.getenv("DB_USER", "hack"),
+    "password": os.getenv("DB_PASS", "HackNation!"),
+}
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+NO_TRANSACTION_MARKER = "-- migrate: no-transaction"
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("migrate")
+
+
+class MigrationError(Exception):
+    pass
+
+
+def load_migrations():
+    migrations = []
+    for path in sorted(glob.glob(os.path.join(MIGRATIONS_DIR, "*.sql"))):
+        name = os.path.basename(path)
+        match = re.match(r"^(\d+)_.+\.sql$", name)
+        if not match:
+            raise MigrationError(f"Niepoprawna nazwa migracji: {name}")
+
+        with open(path, encoding="utf-8") as f:
+            sql = f.read()
+
+        migrations.append({
+            "version": int(match.group(1)),
+            "name": name,
+            "sql": sql,
+            "checksum": hashlib.sha256(sql.encode("utf-8")).hexdigest(),
+            "transactional": not sql.lstrip().startswith(NO_TRANSACTION_MARKER),
+        })
+
+    versions = [m["version"] for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise MigrationError("Zduplikowany numer migracji")
+    return migrations
+
+
+def ensure_migrations_table(conn):
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version    integer primary key,
+                name       varchar(255) not null,
+                checksum   char(64)     not null,
+                applied_at timestamp    not null default now()
+            )
+        """)
+    conn.commit()
+
+
+def applied_migrations(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT version, name, checksum FROM schema_migrations ORDER BY version")
+        return {version: (name, checksum) for version, name, checksum in cur.fetchall()}
+
+
+def apply_migration(conn, migration):
+    logger.info(f"Wykonuję migrację {migration['name']}")
+    record = "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)"
+    params = (migration["version"], migration["name"], migration["checksum"])
+
+    if migration["transactional"]:
+        with conn.cursor() as cur:
+            cur.execute(migration["sql"])
+            cur.execute(record, params)
+        conn.commit()
+        return
+
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            for statement in split_statements(migration["sql"]):
+                cur.execute(statement)
+            cur.execute(record, params)
+    finally:
+        conn.autocommit = False
+
+
+def split_statements(sql):
+    """Dzieli plik no-transaction na pojedyncze polecenia (takie pliki nie moga zawierac funkcji $$)"""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    return [stmt.strip() for stmt in "\n".join(lines).split(";") if stmt.strip()]
+
+
+def migrate(conn, migrations):
+    ensure_migrations_table(conn)
+    applied = applied_migrations(conn)
+
+    pending = []
+    for migration in migrations:
+        if migration["version"] in applied:
+            name, checksum = applied[migration["version"]]
+            if checksum != migration["checksum"]:
+                raise MigrationError(f"Migracja {migration['name']} została zmieniona po wykonaniu")
+        else:
+            pending.append(migration)
+
+    if not pending:
+        logger.info("Schemat jest aktualny.")
+
+    for migration in pending:
+        try:
+            apply_migration(conn, migration)
+        except Exception:
+            conn.rollback()
+            raise
+    return len(pending)
+
+
+def print_status(conn, migrations):
+    ensure_migrations_table(conn)
+    applied = applied_migrations(conn)
+    for migration in migrations:
+        state = "zastosowana" if migration["version"] in applied else "oczekuje"
+        print(f"{migration['name']:<45} {state}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migracje schematu bazy Meluzyna")
+    parser.add_argument("--status", action="store_true", help="pokaż stan migracji bez ich wykonywania")
+    args = parser.parse_args()
+
+    migrations = load_migrations()
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        if args.status:
+            print_status(conn, migrations)
+        else:
+            count = migrate(conn, migrations)
+            logger.info(f"Wykonano {count} migracji.")
+    except MigrationError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
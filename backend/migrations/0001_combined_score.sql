@@ -0,0 +1,17 @@
+-- Snapshot wynikow /scores przeliczany przez backend (refresh_combined_scores)
+create table if not exists public.combined_score
+(
+    section_code varchar(2)       not null
+        constraint combined_score_pk
+            primary key,
+    section_name varchar(255),
+    market_score integer,
+    gus_score    double precision,
+    ceidg_score  double precision,
+    social_score double precision,
+    final_score  double precision not null,
+    computed_at  timestamp        not null
+);
+
+alter table public.combined_score
+    owner to hack;
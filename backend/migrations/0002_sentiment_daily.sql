@@ -0,0 +1,92 @@
+-- Dzienne agregaty nastrojów (pkd, źródło, dzień) utrzymywane przyrostowo przy każdym
+-- INSERT/UPDATE/DELETE komentarza, dzięki czemu wykresy nie skanują surowych tabel.
+-- Wiersze bez timestampu nie trafiają do agregatów.
+create table if not exists public.sentiment_daily
+(
+    pkd          varchar(2)  not null,
+    source       varchar(10) not null,
+    day          date        not null,
+    row_count    integer     not null default 0,
+    emocje_count integer     not null default 0,
+    emocje_sum   bigint      not null default 0,
+    constraint sentiment_daily_pk
+        primary key (pkd, source, day)
+);
+
+alter table public.sentiment_daily
+    owner to hack;
+
+create or replace function public.sentiment_daily_apply(p_tag_id integer, p_source varchar, p_ts timestamp,
+                                                        p_emocje integer, p_sign integer) returns void
+    language plpgsql
+as
+$$
+BEGIN
+    IF p_ts IS NULL THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO public.sentiment_daily AS s (pkd, source, day, row_count, emocje_count, emocje_sum)
+    SELECT t.pkd_id, p_source, p_ts::date, p_sign,
+           CASE WHEN p_emocje IS NULL THEN 0 ELSE p_sign END,
+           COALESCE(p_emocje, 0) * p_sign
+    FROM public.tag t
+    WHERE t.id = p_tag_id
+    ON CONFLICT (pkd, source, day) DO UPDATE
+        SET row_count    = s.row_count + EXCLUDED.row_count,
+            emocje_count = s.emocje_count + EXCLUDED.emocje_count,
+            emocje_sum   = s.emocje_sum + EXCLUDED.emocje_sum;
+END;
+$$;
+
+alter function public.sentiment_daily_apply(integer, varchar, timestamp, integer, integer) owner to hack;
+
+create or replace function public.sentiment_daily_rollup() returns trigger
+    language plpgsql
+as
+$$
+BEGIN
+    -- TG_ARGV[0] = 'youtube' albo 'wykop'
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM public.sentiment_daily_apply(OLD.tag_id, TG_ARGV[0], OLD.timestamp, OLD.emocje, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM public.sentiment_daily_apply(NEW.tag_id, TG_ARGV[0], NEW.timestamp, NEW.emocje, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+alter function public.sentiment_daily_rollup() owner to hack;
+
+drop trigger if exists trigger_sentiment_daily on public.komentarz_youtube;
+create trigger trigger_sentiment_daily
+    after insert or update of tag_id, timestamp, emocje or delete
+    on public.komentarz_youtube
+    for each row
+execute procedure public.sentiment_daily_rollup('youtube');
+
+drop trigger if exists trigger_sentiment_daily on public.post_wykop;
+create trigger trigger_sentiment_daily
+    after insert or update of tag_id, timestamp, emocje or delete
+    on public.post_wykop
+    for each row
+execute procedure public.sentiment_daily_rollup('wykop');
+
+-- Wypełnienie agregatów dla danych sprzed utworzenia triggerów. Blokada wstrzymuje zapisy
+-- kolektorów do końca transakcji, więc agregaty są spójne z surowymi tabelami.
+lock table public.komentarz_youtube, public.post_wykop in share mode;
+truncate public.sentiment_daily;
+
+insert into public.sentiment_daily (pkd, source, day, row_count, emocje_count, emocje_sum)
+select t.pkd_id, 'youtube', k.timestamp::date, count(*), count(k.emocje), coalesce(sum(k.emocje), 0)
+from public.komentarz_youtube k
+         join public.tag t on t.id = k.tag_id
+where k.timestamp is not null
+group by t.pkd_id, k.timestamp::date
+union all
+select t.pkd_id, 'wykop', w.timestamp::date, count(*), count(w.emocje), coalesce(sum(w.emocje), 0)
+from public.post_wykop w
+         join public.tag t on t.id = w.tag_id
+where w.timestamp is not null
+group by t.pkd_id, w.timestamp::date;
@@ -0,0 +1,33 @@
+-- migrate: no-transaction
+-- Indeksy pod najczestsze zapytania API (main.py). CONCURRENTLY nie blokuje zapisow kolektorow,
+-- dlatego ta migracja jest wykonywana poza transakcja. Sprawdzenie planow: python check_query_plans.py
+
+-- Najnowszy raport: ORDER BY date DESC LIMIT 1
+create index concurrently if not exists report_date_idx
+    on public.report (date desc) include (id);
+
+-- Sekcje najnowszego raportu (/markets/scores/latest, /markets/sectors/top, /scores)
+create index concurrently if not exists section_report_code_idx
+    on public.section (report_id, section_code);
+
+-- Historia jednej sekcji (/markets/sectors/{code}, /markets/scores/{code})
+create index concurrently if not exists section_code_report_idx
+    on public.section (section_code, report_id);
+
+-- Tagi sektora: SELECT id FROM tag WHERE pkd_id = ?
+create index concurrently if not exists tag_pkd_idx
+    on public.tag (pkd_id) include (id);
+
+-- Komentarze sektora stronicowane po (timestamp DESC NULLS LAST, id DESC)
+create index concurrently if not exists komentarz_youtube_tag_ts_idx
+    on public.komentarz_youtube (tag_id, timestamp desc nulls last, id desc) include (emocje);
+
+create index concurrently if not exists post_wykop_tag_ts_idx
+    on public.post_wykop (tag_id, timestamp desc nulls last, id desc) include (emocje);
+
+-- CEIDG i GUS sektora w zakresie dat (/charts/history, /ceidg/scores/{code})
+create index concurrently if not exists ceidg_pkd_utworzono_idx
+    on public.ceidg (pkd_id, utworzono) include (wskaznik);
+
+create index concurrently if not exists gus_pkd_timestamp_idx
+    on public.gus (pkd, timestamp) include (wskaznik);
@@ -0,0 +1,57 @@
+-- Powiadomienie NOTIFY meluzyna_ingest po każdym zapisie kolektorów (raport, GUS, CEIDG, media).
+-- Trigger jest wykonywany raz na polecenie, a Postgres scala identyczne powiadomienia w obrębie
+-- transakcji, więc wsadowe ładowanie danych wysyła pojedyncze powiadomienie na tabelę.
+-- Payload to nazwa tabeli; backend (events.py) przelicza snapshot combined_score i wysyła różnice przez SSE.
+create or replace function public.notify_data_ingested() returns trigger
+    language plpgsql
+as
+$$
+BEGIN
+    PERFORM pg_notify('meluzyna_ingest', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$;
+
+alter function public.notify_data_ingested() owner to hack;
+
+drop trigger if exists trigger_notify_ingest on public.report;
+create trigger trigger_notify_ingest
+    after insert or update or delete
+    on public.report
+    for each statement
+execute procedure public.notify_data_ingested();
+
+drop trigger if exists trigger_notify_ingest on public.section;
+create trigger trigger_notify_ingest
+    after insert or update or delete
+    on public.section
+    for each statement
+execute procedure public.notify_data_ingested();
+
+drop trigger if exists trigger_notify_ingest on public.gus;
+create trigger trigger_notify_ingest
+    after insert or update or delete
+    on public.gus
+    for each statement
+execute procedure public.notify_data_ingested();
+
+drop trigger if exists trigger_notify_ingest on public.ceidg;
+create trigger trigger_notify_ingest
+    after insert or update or delete
+    on public.ceidg
+    for each statement
+execute procedure public.notify_data_ingested();
+
+drop trigger if exists trigger_notify_ingest on public.komentarz_youtube;
+create trigger trigger_notify_ingest
+    after insert or update or delete
+    on public.komentarz_youtube
+    for each statement
+execute procedure public.notify_data_ingested();
+
+drop trigger if exists trigger_notify_ingest on public.post_wykop;
+create trigger trigger_notify_ingest
+    after insert or update or delete
+    on public.post_wykop
+    for each statement
+execute procedure public.notify_data_ingested();
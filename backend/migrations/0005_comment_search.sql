@@ -0,0 +1,31 @@
+-- Wyszukiwanie pełnotekstowe w komentarzach YouTube i wpisach Wykop (/search/comments).
+-- Konfiguracja public.meluzyna_pl kopiuje słownik 'polish', jeśli serwer go ma (Postgres nie dostarcza
+-- go domyślnie - wymaga słownika ispell/hunspell), w przeciwnym razie 'simple' (bez stemmingu).
+-- Kolumny search_tsv są generowane przez bazę, więc kolektory nie muszą ich wypełniać.
+-- Dodanie kolumny STORED przepisuje tabelę - migrację najlepiej wykonać poza godzinami zbierania danych.
+DO
+$$
+BEGIN
+    IF NOT EXISTS (SELECT 1
+                   FROM pg_ts_config c
+                            JOIN pg_namespace n ON n.oid = c.cfgnamespace
+                   WHERE c.cfgname = 'meluzyna_pl' AND n.nspname = 'public') THEN
+        IF EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'polish') THEN
+            CREATE TEXT SEARCH CONFIGURATION public.meluzyna_pl (COPY = polish);
+        ELSE
+            RAISE NOTICE 'Brak konfiguracji polish - wyszukiwanie używa konfiguracji simple';
+            CREATE TEXT SEARCH CONFIGURATION public.meluzyna_pl (COPY = simple);
+        END IF;
+    END IF;
+END;
+$$;
+
+alter text search configuration public.meluzyna_pl owner to hack;
+
+alter table public.komentarz_youtube
+    add column if not exists search_tsv tsvector
+        generated always as (to_tsvector('public.meluzyna_pl'::regconfig, coalesce(komentarz, ''))) stored;
+
+alter table public.post_wykop
+    add column if not exists search_tsv tsvector
+        generated always as (to_tsvector('public.meluzyna_pl'::regconfig, coalesce(post, ''))) stored;
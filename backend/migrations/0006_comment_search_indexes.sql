@@ -0,0 +1,7 @@
+-- migrate: no-transaction
+-- Indeksy GIN pod /search/comments. CONCURRENTLY nie blokuje zapisow kolektorow.
+create index concurrently if not exists komentarz_youtube_search_idx
+    on public.komentarz_youtube using gin (search_tsv);
+
+create index concurrently if not exists post_wykop_search_idx
+    on public.post_wykop using gin (search_tsv);
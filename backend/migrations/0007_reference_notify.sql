@@ -0,0 +1,15 @@
+-- Zmiany słowników tag i pkd też wysyłają NOTIFY meluzyna_ingest (funkcja z 0004), dzięki czemu
+-- backend od razu przeładowuje dane referencyjne (tag -> PKD, nazwy PKD) zamiast czekać na REFERENCE_TTL.
+drop trigger if exists trigger_notify_ingest on public.tag;
+create trigger trigger_notify_ingest
+    after insert or update or delete
+    on public.tag
+    for each statement
+execute procedure public.notify_data_ingested();
+
+drop trigger if exists trigger_notify_ingest on public.pkd;
+create trigger trigger_notify_ingest
+    after insert or update or delete
+    on public.pkd
+    for each statement
+execute procedure public.notify_data_ingested();
@@ -0,0 +1,42 @@
+-- Id raportow i sekcji z sekwencji zamiast SELECT MAX(id) + 1 (wyscig przy rownoleglych zapisach)
+-- oraz unikalnosc (data raportu, sekcja), dzieki ktorej ponowne uruchomienie generateFinancialAnalysis.py
+-- tego samego dnia nadpisuje wiersze (INSERT ... ON CONFLICT) zamiast je dublowac.
+
+create sequence if not exists public.report_id_seq owned by public.report.id;
+select setval('public.report_id_seq', coalesce((select max(id) from public.report), 0) + 1, false);
+alter table public.report
+    alter column id set default nextval('public.report_id_seq');
+
+create sequence if not exists public.section_id_seq owned by public.section.id;
+select setval('public.section_id_seq', coalesce((select max(id) from public.section), 0) + 1, false);
+alter table public.section
+    alter column id set default nextval('public.section_id_seq');
+
+alter sequence public.report_id_seq owner to hack;
+alter sequence public.section_id_seq owner to hack;
+
+-- Dotychczasowe ponowne uruchomienia tego samego dnia: zostaje najnowszy raport z danego dnia
+-- i najnowszy wiersz kazdej sekcji w raporcie
+delete
+from public.section s
+    using public.report r
+where r.id = s.report_id
+  and exists (select 1 from public.report newer where newer.date = r.date and newer.id > r.id);
+
+delete
+from public.report r
+where exists (select 1 from public.report newer where newer.date = r.date and newer.id > r.id);
+
+delete
+from public.section s
+where exists (select 1
+              from public.section newer
+              where newer.report_id = s.report_id
+                and newer.section_code = s.section_code
+                and newer.id > s.id);
+
+alter table public.report
+    add constraint report_date_key unique (date);
+
+alter table public.section
+    add constraint section_report_code_key unique (report_id, section_code);
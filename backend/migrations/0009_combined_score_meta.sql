@@ -0,0 +1,16 @@
+-- Wersja danych zrodlowych, z ktorej policzono snapshot combined_score. Trzymana w bazie obok snapshotu
+-- (a nie w pamieci procesu), wiec kazdy worker porownuje sie z tym, co faktycznie jest zapisane,
+-- i po zmianie danych snapshot przelicza tylko jeden z nich.
+create table if not exists public.combined_score_meta
+(
+    id           boolean   default true not null
+        constraint combined_score_meta_pk
+            primary key
+        constraint combined_score_meta_single_row
+            check (id),
+    data_version text      not null,
+    computed_at  timestamp not null
+);
+
+alter table public.combined_score_meta
+    owner to hack;
@@ -0,0 +1,30 @@
+-- Licznik zapisow do tabel zrodlowych jako wersja danych (snapshot combined_score, ETag).
+-- max(id) / max(timestamp) nie zmienialy sie przy UPDATE (np. kolektory uzupelniaja emocje po wstawieniu)
+-- ani przy ponownym zapisie raportu z tego samego dnia. Wiersz na tabele, zeby rownolegle kolektory
+-- nie czekaly na jedna blokade; licznik zwieksza sie w transakcji zapisu, wiec nowa wersja
+-- jest widoczna dopiero razem z danymi.
+create table if not exists public.data_version
+(
+    table_name text   not null
+        constraint data_version_pk
+            primary key,
+    version    bigint not null
+);
+
+alter table public.data_version
+    owner to hack;
+
+create or replace function public.notify_data_ingested() returns trigger
+    language plpgsql
+as
+$$
+BEGIN
+    INSERT INTO public.data_version (table_name, version)
+    VALUES (TG_TABLE_NAME, 1)
+    ON CONFLICT (table_name) DO UPDATE SET version = data_version.version + 1;
+    PERFORM pg_notify('meluzyna_ingest', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$;
+
+alter function public.notify_data_ingested() owner to hack;
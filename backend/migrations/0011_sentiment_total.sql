@@ -0,0 +1,66 @@
+-- Sumy nastrojow na (pkd, zrodlo) niezalezne od dnia - z nich liczony jest social_score w /scores.
+-- sentiment_daily pomija wiersze bez timestampu, a wykop.py przed poprawka nie zapisywal timestampu,
+-- wiec cala historia post_wykop wypadlaby z wyniku. Tu trafiaja wszystkie wiersze, jak w zapytaniu sprzed rollupu.
+create table if not exists public.sentiment_total
+(
+    pkd          varchar(2)  not null,
+    source       varchar(10) not null,
+    row_count    integer     not null default 0,
+    emocje_count integer     not null default 0,
+    emocje_sum   bigint      not null default 0,
+    constraint sentiment_total_pk
+        primary key (pkd, source)
+);
+
+alter table public.sentiment_total
+    owner to hack;
+
+-- Ta sama funkcja co w 0002, dodatkowo aktualizuje sentiment_total (takze dla wierszy bez timestampu)
+create or replace function public.sentiment_daily_apply(p_tag_id integer, p_source varchar, p_ts timestamp,
+                                                        p_emocje integer, p_sign integer) returns void
+    language plpgsql
+as
+$$
+BEGIN
+    INSERT INTO public.sentiment_total AS s (pkd, source, row_count, emocje_count, emocje_sum)
+    SELECT t.pkd_id, p_source, p_sign,
+           CASE WHEN p_emocje IS NULL THEN 0 ELSE p_sign END,
+           COALESCE(p_emocje, 0) * p_sign
+    FROM public.tag t
+    WHERE t.id = p_tag_id
+    ON CONFLICT (pkd, source) DO UPDATE
+        SET row_count    = s.row_count + EXCLUDED.row_count,
+            emocje_count = s.emocje_count + EXCLUDED.emocje_count,
+            emocje_sum   = s.emocje_sum + EXCLUDED.emocje_sum;
+
+    IF p_ts IS NULL THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO public.sentiment_daily AS s (pkd, source, day, row_count, emocje_count, emocje_sum)
+    SELECT t.pkd_id, p_source, p_ts::date, p_sign,
+           CASE WHEN p_emocje IS NULL THEN 0 ELSE p_sign END,
+           COALESCE(p_emocje, 0) * p_sign
+    FROM public.tag t
+    WHERE t.id = p_tag_id
+    ON CONFLICT (pkd, source, day) DO UPDATE
+        SET row_count    = s.row_count + EXCLUDED.row_count,
+            emocje_count = s.emocje_count + EXCLUDED.emocje_count,
+            emocje_sum   = s.emocje_sum + EXCLUDED.emocje_sum;
+END;
+$$;
+
+-- Wypelnienie sum dla istniejacych danych, pod ta sama blokada co w 0002
+lock table public.komentarz_youtube, public.post_wykop in share mode;
+truncate public.sentiment_total;
+
+insert into public.sentiment_total (pkd, source, row_count, emocje_count, emocje_sum)
+select t.pkd_id, 'youtube', count(*), count(k.emocje), coalesce(sum(k.emocje), 0)
+from public.komentarz_youtube k
+         join public.tag t on t.id = k.tag_id
+group by t.pkd_id
+union all
+select t.pkd_id, 'wykop', count(*), count(w.emocje), coalesce(sum(w.emocje), 0)
+from public.post_wykop w
+         join public.tag t on t.id = w.tag_id
+group by t.pkd_id;
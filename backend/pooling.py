@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+from uuid import uuid4
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+def env_bool(name, default):
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long checkouts wait for a free connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "pid": os.getpid(),
+                "pool_size": self.size(),
+                "checked_out": self.checkedout(),
+                "checked_in": self.checkedin(),
+                "overflow": max(0, self.overflow()),
+                "max_overflow": self._max_overflow,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+            }
+
+
+def engine_options_from_env():
+    """
+    create_async_engine() keyword arguments read from the environment.
+    DB_PGBOUNCER=true disables asyncpg's prepared statement caches so the API can sit behind
+    PgBouncer in transaction pooling mode.
+    """
+    pgbouncer = env_bool("DB_PGBOUNCER", False)
+
+    connect_args = {
+        "statement_cache_size": 0 if pgbouncer else int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100")),
+    }
+    if pgbouncer:
+        # Unikalne nazwy, bo PgBouncer moze podac polaczenie z cudzymi prepared statements
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid4()}__"
+
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": env_bool("DB_POOL_PRE_PING", True),
+        "connect_args": connect_args,
+    }
+
+
+def database_url_query():
+    """URL query for SQLAlchemy's own asyncpg prepared statement cache"""
+    if env_bool("DB_PGBOUNCER", False):
+        return "?prepared_statement_cache_size=0"
+    return f"?prepared_statement_cache_size={int(os.getenv('DB_PREPARED_STATEMENT_CACHE_SIZE', '100'))}"
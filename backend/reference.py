@@ -0,0 +1,44 @@
+import logging
+import time
+
+from cache import ReloadingValue
+
+logger = logging.getLogger("meluzyna.reference")
+
+
+class ReferenceData:
+    """Small lookups that almost every handler needs: the latest report, tag -> PKD and PKD names"""
+
+    def __init__(self, latest_report_id=None, latest_report_date=None, tag_pkd=None, pkd_names=None):
+        self.latest_report_id = latest_report_id
+        self.latest_report_date = latest_report_date
+        self.tag_pkd = tag_pkd or {}
+        self.pkd_names = pkd_names or {}
+        self.pkd_tags = {}
+        for tag_id, pkd in self.tag_pkd.items():
+            self.pkd_tags.setdefault(pkd, []).append(tag_id)
+        self.loaded_at = time.time()
+
+    def tags_for(self, *codes):
+        return sorted(tag_id for code in codes for tag_id in self.pkd_tags.get(code, ()))
+
+
+class ReferenceRegistry(ReloadingValue):
+    """
+    In-process copy of ReferenceData, reloaded after ttl seconds or as soon as invalidate()
+    is called (ingest notifications). load(session_factory=None) builds a new ReferenceData;
+    reload(session_factory) forces it, e.g. from the primary right before the snapshot refresh.
+    """
+
+    def stats(self):
+        data = self.value
+        return {
+            "loaded": data is not None,
+            "loads": self.loads,
+            "ttl": self.ttl,
+            "latest_report_id": data.latest_report_id if data else None,
+            "latest_report_date": data.latest_report_date if data else None,
+            "tags": len(data.tag_pkd) if data else 0,
+            "pkd": len(data.pkd_names) if data else 0,
+            "loaded_at": data.loaded_at if data else None,
+        }
@@ -0,0 +1,99 @@
+import asyncio
+import itertools
+import logging
+import time
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+logger = logging.getLogger("meluzyna.replicas")
+
+# 0 gdy replika strumieniuje WAL i odtworzyla wszystko co dostala, w przeciwnym razie wiek ostatniej
+# odtworzonej transakcji. Rozlaczony walreceiver tez ma receive = replay, wiec bez sprawdzenia statusu
+# zatrzymana replika uchodzilaby za aktualna. NULL (nic jeszcze nie odtworzono) - replika sie nie kwalifikuje.
+# Status w pg_stat_wal_receiver widza tylko role z pg_read_all_stats; bez niej liczy sie sam wiek transakcji.
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+             AND EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+""")
+
+
+class Replica:
+    def __init__(self, name, url, engine_options):
+        self.name = name
+        self.engine = create_async_engine(url, echo=False, **engine_options)
+        self.session_factory = sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.healthy = False
+        self.lag = None
+        self.last_error = None
+        self.checked_at = None
+
+        @event.listens_for(self.engine.sync_engine, "handle_error")
+        def mark_down_on_disconnect(context):
+            if context.is_disconnect:
+                self.healthy = False
+                self.last_error = str(context.original_exception)
+                logger.warning(f"Replika {self.name} niedostępna - zapytania idą na primary")
+
+
+class ReplicaRouter:
+    """
+    Chooses where read-only sessions go: a healthy replica whose lag is within max_lag seconds
+    (round-robin), or the primary when no replica qualifies.
+    """
+
+    def __init__(self, urls, engine_options, max_lag):
+        self.replicas = [Replica(f"replica{i}", url, engine_options) for i, url in enumerate(urls, start=1)]
+        self.max_lag = max_lag
+        self._round_robin = itertools.cycle(self.replicas) if self.replicas else None
+
+    def pick(self):
+        for _ in range(len(self.replicas)):
+            replica = next(self._round_robin)
+            if replica.healthy and replica.lag is not None and replica.lag <= self.max_lag:
+                return replica
+        return None
+
+    def session_factory(self, primary_factory):
+        replica = self.pick()
+        return replica.session_factory if replica else primary_factory
+
+    async def check(self, replica):
+        try:
+            async with replica.engine.connect() as conn:
+                lag = (await conn.execute(REPLICA_LAG_SQL)).scalar()
+            replica.lag = float(lag) if lag is not None else None
+            replica.healthy = True
+            replica.last_error = None
+        except Exception as e:
+            if replica.healthy:
+                logger.warning(f"Replika {replica.name} niedostępna: {e}")
+            replica.healthy = False
+            replica.last_error = str(e)
+        replica.checked_at = time.time()
+
+    async def run_health_checks(self, interval):
+        while True:
+            await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+            await asyncio.sleep(interval)
+
+    def stats(self):
+        return {
+            "max_lag": self.max_lag,
+            "replicas": [
+                {
+                    "name": r.name,
+                    "healthy": r.healthy,
+                    "lag_seconds": r.lag,
+                    "last_error": r.last_error,
+                    "checked_at": r.checked_at,
+                    "pool": r.engine.pool.stats() if hasattr(r.engine.pool, "stats") else None,
+                }
+                for r in self.replicas
+            ],
+        }
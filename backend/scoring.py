@@ -0,0 +1,93 @@
+import math
+import warnings
+
+import numpy as np
+
+# Kolumny wynikow zrodel w kolejnosci kolumn macierzy
+SOURCES = ("market", "gus", "ceidg", "social")
+SOURCE_COLUMNS = tuple(f"{source}_score" for source in SOURCES)
+NORMALIZATIONS = ("none", "minmax", "zscore")
+
+
+class ScoringConfig:
+    """
+    Source weights and normalization of the combined score. With equal weights and no normalization
+    the final score is the plain average of the sources that have data for a sector.
+    """
+
+    def __init__(self, weights=None, normalization="none"):
+        weights = {**{source: 1.0 for source in SOURCES}, **(weights or {})}
+        unknown = set(weights) - set(SOURCES)
+        if unknown:
+            raise ValueError(f"Nieznane źródła: {', '.join(sorted(unknown))} (dozwolone: {', '.join(SOURCES)})")
+        if not all(math.isfinite(w) for w in weights.values()):
+            # NaN/Infinity (json.loads je akceptuje) dalyby final_score NaN, ktorego nie da sie zserializowac
+            raise ValueError("Wagi muszą być skończonymi liczbami")
+        if any(w < 0 for w in weights.values()):
+            raise ValueError("Wagi nie mogą być ujemne")
+        if normalization not in NORMALIZATIONS:
+            raise ValueError(f"Nieznana normalizacja: {normalization} (dozwolone: {', '.join(NORMALIZATIONS)})")
+
+        self.weights = {source: float(weights[source]) for source in SOURCES}
+        self.normalization = normalization
+        self.weight_vector = np.array([self.weights[source] for source in SOURCES])
+
+    @classmethod
+    def from_spec(cls, weights_spec, normalization="none"):
+        """'market=2,social=0.5' -> weights (unlisted sources keep weight 1)"""
+        weights = {}
+        for part in filter(None, (p.strip() for p in weights_spec.split(","))):
+            source, _, weight = part.partition("=")
+            weights[source.strip()] = float(weight)
+        return cls(weights, normalization)
+
+    def as_dict(self):
+        return {"weights": self.weights, "normalization": self.normalization}
+
+
+def normalize(values, method):
+    """Column-wise rescaling that ignores missing (NaN) values"""
+    # Pusta tabela (pusty snapshot) - nanmin/nanmax na zerowej osi rzucaja ValueError
+    if method == "none" or values.size == 0:
+        return values
+
+    with warnings.catch_warnings():
+        # Kolumna bez zadnych danych - nanmin/nanmean zwracaja NaN z ostrzezeniem
+        warnings.simplefilter("ignore", RuntimeWarning)
+        if method == "minmax":
+            low, high = np.nanmin(values, axis=0), np.nanmax(values, axis=0)
+            span = high - low
+            scaled = np.where(span > 0, (values - low) / np.where(span > 0, span, 1) * 100, 50.0)
+        else:
+            mean, std = np.nanmean(values, axis=0), np.nanstd(values, axis=0)
+            scaled = np.where(std > 0, 50 + 10 * (values - mean) / np.where(std > 0, std, 1), 50.0)
+
+    # Brak danych zostaje brakiem - stala kolumna nie moze "wypelnic" sekcji bez danych
+    return np.where(np.isnan(values), np.nan, scaled)
+
+
+class ScoreTable:
+    """Raw source scores of all sectors as one (sectors x sources) array; NaN = no data from a source"""
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.values = np.array(
+            [[np.nan if row.get(column) is None else float(row[column]) for column in SOURCE_COLUMNS] for row in self.rows],
+            dtype=float,
+        ).reshape(len(self.rows), len(SOURCES))
+
+    def final_scores(self, config):
+        """Weighted mean of the available (normalized) sources per sector, 0.0 when a sector has none"""
+        values = normalize(self.values, config.normalization)
+        present = ~np.isnan(values)
+        weights = present * config.weight_vector
+        weighted = np.where(present, values, 0.0) @ config.weight_vector
+        total = weights.sum(axis=1)
+        final = np.divide(weighted, total, out=np.zeros(len(self.rows)), where=total > 0)
+        return np.round(final, 2)
+
+    def ranked(self, config):
+        """Rows with final_score, best first"""
+        final = self.final_scores(config)
+        order = np.argsort(-final, kind="stable")
+        return [{**self.rows[i], "final_score": float(final[i])} for i in order]
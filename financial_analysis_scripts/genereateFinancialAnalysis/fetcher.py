@@ -0,0 +1,234 @@
+import asyncio
+import collections
+import concurrent.futures
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import aiohttp
+
+logger = logging.getLogger("GPW_Fin_Only.fetcher")
+
+# Odpowiedzi, po ktorych warto sprobowac ponownie; 429 i 503 oznaczaja tez "zwolnij"
+THROTTLE_STATUSES = {429, 503}
+RETRY_STATUSES = THROTTLE_STATUSES | {500, 502, 504}
+
+
+class FetchError(Exception):
+    """Request that failed for good (after retries or with a non-retryable status)"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class RetryableError(Exception):
+    """
+    Raised inside an attempt to request another one. throttled = the host asked us to slow down,
+    congested = throttled or timed out, both shrink the host's concurrency window.
+    """
+
+    def __init__(self, message, throttled=False, congested=False, retry_after=None):
+        super().__init__(message)
+        self.throttled = throttled
+        self.congested = throttled or congested
+        self.retry_after = retry_after
+
+
+class HostLimiter:
+    """
+    Per-host request rate (starts per second) and AIMD concurrency window: +1 slot per window
+    of successful requests, halved on throttling or timeouts (at most once per cooldown, so a burst
+    of 429s from one window counts as one signal).
+    """
+
+    def __init__(self, rate, initial_concurrency, max_concurrency, min_concurrency=1, cooldown=2.0):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.limit = float(initial_concurrency)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._next_start = 0.0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+            now = time.monotonic()
+            start = max(now, self._next_start, self.paused_until)
+            self._next_start = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def release(self, congested=False, retry_after=None):
+        async with self._condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if congested:
+                if now - self._last_decrease > self.cooldown:
+                    self.limit = max(self.min_concurrency, self.limit / 2)
+                    self._last_decrease = now
+                if retry_after:
+                    self.paused_until = max(self.paused_until, now + retry_after)
+            else:
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def is_throttle_error(exc):
+    """yfinance/requests do not share an exception type for HTTP 429, so look at what they expose"""
+    response = getattr(exc, "response", None)
+    if getattr(response, "status_code", None) in THROTTLE_STATUSES:
+        return True
+    return "RateLimit" in type(exc).__name__ or "Too Many Requests" in str(exc)
+
+
+def is_timeout_error(exc):
+    return isinstance(exc, (TimeoutError, asyncio.TimeoutError, ConnectionError)) or "Timeout" in type(exc).__name__
+
+
+class AsyncFetcher:
+    """
+    Shared HTTP layer of the GPW pipeline: one keep-alive connection pool, a HostLimiter per host,
+    exponential backoff with jitter for throttling, timeouts and 5xx, and per-host outcome counters.
+    Blocking clients (yfinance) go through call_blocking() and get the same limits and retries.
+
+        async with AsyncFetcher(host_rates={"www.bankier.pl": 5}) as fetcher:
+            html = await fetcher.get_text(url)
+    """
+
+    def __init__(self, host_rates=None, default_rate=5.0, initial_concurrency=4, max_concurrency=16,
+                 retries=4, backoff=0.5, max_backoff=30.0, timeout=20.0, headers=None):
+        self.host_rates = host_rates or {}
+        self.default_rate = default_rate
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.headers = headers or {}
+        self.limiters = {}
+        self.stats = collections.defaultdict(collections.Counter)
+        self.latency = collections.defaultdict(float)
+        self.session = None
+        self._executor = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency * 2, limit_per_host=self.max_concurrency,
+                                         keepalive_timeout=30, ttl_dns_cache=300)
+        self.session = aiohttp.ClientSession(connector=connector, headers=self.headers,
+                                             timeout=aiohttp.ClientTimeout(total=self.timeout))
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_concurrency)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def limiter(self, host):
+        if host not in self.limiters:
+            self.limiters[host] = HostLimiter(self.host_rates.get(host, self.default_rate),
+                                              self.initial_concurrency, self.max_concurrency)
+        return self.limiters[host]
+
+    async def get_text(self, url, not_found_ok=True):
+        """Response body, or None for 404 when not_found_ok"""
+
+        async def attempt():
+            async with self.session.get(url) as response:
+                if response.status == 404 and not_found_ok:
+                    return None
+                if response.status in RETRY_STATUSES:
+                    raise RetryableError(f"HTTP {response.status}", throttled=response.status in THROTTLE_STATUSES,
+                                         retry_after=parse_retry_after(response.headers.get("Retry-After")))
+                if response.status >= 400:
+                    raise FetchError(f"HTTP {response.status}: {url}", status=response.status)
+                return await response.text()
+
+        return await self._run(urlsplit(url).hostname, attempt)
+
+    async def call_blocking(self, host, func, *args):
+        """func(*args) in the worker pool, limited and retried as a request to host"""
+        loop = asyncio.get_running_loop()
+
+        async def attempt():
+            try:
+                return await loop.run_in_executor(self._executor, func, *args)
+            except Exception as e:
+                if is_throttle_error(e) or is_timeout_error(e):
+                    raise RetryableError(str(e), throttled=is_throttle_error(e), congested=True) from e
+                raise
+
+        return await self._run(host, attempt)
+
+    async def _run(self, host, attempt):
+        limiter = self.limiter(host)
+        stats = self.stats[host]
+        for retry in range(self.retries + 1):
+            await limiter.acquire()
+            started = time.monotonic()
+            congested, retry_after = False, None
+            try:
+                stats["attempts"] += 1
+                result = await attempt()
+                stats["ok" if result is not None else "not_found"] += 1
+                return result
+            except RetryableError as e:
+                congested, retry_after = e.congested, e.retry_after
+                stats["throttled" if e.throttled else "retryable_errors"] += 1
+                last_error = e
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                # Timeout i zerwane polaczenie to tez sygnal przeciazenia - zmniejszamy okno jak przy 429
+                congested = True
+                stats["timeouts"] += 1
+                last_error = e
+            except FetchError:
+                stats["failed"] += 1
+                raise
+            except Exception:
+                stats["errors"] += 1
+                raise
+            finally:
+                self.latency[host] += time.monotonic() - started
+                await limiter.release(congested=congested, retry_after=retry_after)
+
+            if retry < self.retries:
+                stats["retries"] += 1
+                delay = retry_after or min(self.max_backoff, self.backoff * 2 ** retry)
+                await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+
+        stats["failed"] += 1
+        raise FetchError(f"{host}: brak odpowiedzi po {self.retries + 1} próbach ({last_error})")
+
+    def summary(self):
+        return {
+            host: {
+                **counts,
+                "concurrency": round(self.limiters[host].limit, 1),
+                "avg_latency_s": round(self.latency[host] / counts["attempts"], 3) if counts["attempts"] else None,
+            }
+            for host, counts in self.stats.items()
+        }
+
+    def log_summary(self):
+        for host, summary in self.summary().items():
+            logger.info(f"{host}: {summary}")
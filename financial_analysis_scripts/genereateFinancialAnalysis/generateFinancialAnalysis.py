@@ -1,13 +1,19 @@
+import io
 import os
 import json
 import time
+import asyncio
 import datetime
-import concurrent.futures
+import sqlite3
+import dataclasses
+import numpy as np
 import pandas as pd
 import yfinance as yf
 import logging
 import psycopg2
-from psycopg2 import sql
+from psycopg2.extras import execute_values
+
+from fetcher import AsyncFetcher
 
 DB_CONFIG = {
     "host": "212.132.76.195",
@@ -29,8 +35,36 @@ logging.basicConfig(
 logger = logging.getLogger("GPW_Fin_Only")
 
 CACHE_FILE = "tickers_cache.json"
+SLUG_CACHE_FILE = "slugs_cache.json"
+FUNDAMENTALS_DB = "fundamentals.sqlite"
 OUTPUT_DIR = "reports_financial"
 
+MARKET_LIST_URL = "https://www.bankier.pl/gielda/notowania/akcje"
+BANKIER_HOST = "www.bankier.pl"
+# yfinance sam buduje zapytania do Yahoo - to tylko klucz limitow w AsyncFetcher
+YAHOO_HOST = "finance.yahoo.com"
+# Maksymalna liczba rozpoczetych zapytan na sekunde; wspolbieznosc dobiera AsyncFetcher (AIMD)
+HOST_RATES = {BANKIER_HOST: 5, YAHOO_HOST: 4}
+HTTP_HEADERS = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"}
+
+# Po ilu dniach pole uznajemy za nieaktualne. Pola zalezne od kursu starzeja sie szybciej
+# niz dane ze sprawozdan (zmieniaja sie raz na kwartal). Jedno zapytanie yfinance zwraca
+# wszystkie pola naraz, wiec ticker jest pobierany, gdy nieaktualne jest ktorekolwiek z nich.
+FIELD_MAX_AGE_DAYS = {
+    'PKD_ID': 90,
+    'MarketCap': 7,
+    'PE_Trailing': 7,
+    'PB_Ratio': 7,
+    'DividendYield': 7,
+    'Revenue': 30,
+    'ROE': 30,
+    'ProfitMargin': 30,
+}
+# Slugi bez tickera GPW (np. spolki z NewConnect) sprawdzamy ponownie po tylu dniach
+SLUG_NEGATIVE_RECHECK_DAYS = 30
+# Tickery, dla ktorych yfinance nie zwraca danych (np. wycofane z obrotu), sprawdzamy ponownie po tylu dniach
+MISSING_RECHECK_DAYS = 7
+
 if not os.path.exists(OUTPUT_DIR): os.makedirs(OUTPUT_DIR)
 
 PKD_DESCRIPTIONS = {
@@ -157,33 +191,90 @@ YFINANCE_SECTOR_FALLBACK = {
     "Utilities": "D"
 }
 
-def fetch_ticker_from_slug(slug):
-    """Pobiera ticker ze strony szczegółów spółki"""
+def new_fetcher():
+    return AsyncFetcher(host_rates=HOST_RATES, headers=HTTP_HEADERS)
+
+
+async def gather_with_progress(coros, label, every):
+    """asyncio.gather(return_exceptions=True) z logowaniem postepu co every zakonczonych zadan"""
+    completed = 0
+
+    async def tracked(coro):
+        nonlocal completed
+        try:
+            return await coro
+        finally:
+            completed += 1
+            if completed % every == 0:
+                logger.info(f"{label}: {completed}/{len(coros)}")
+
+    return await asyncio.gather(*(tracked(c) for c in coros), return_exceptions=True)
+
+
+def parse_ticker_page(html):
     try:
-        url = f"https://www.bankier.pl/gielda/notowania/akcje/{slug}/podstawowe-dane"
-        tables = pd.read_html(url, match="Ticker GPW")
-        if tables:
-            ticker = tables[0].iloc[3, 1]
+        tables = pd.read_html(io.StringIO(html), match="Ticker GPW")
+    except ValueError:
+        # read_html nie znalazl tabeli z tickerem
+        return None
+    if tables:
+        ticker = tables[0].iloc[3, 1]
+        if not pd.isna(ticker):
             return ticker
-    except:
-        pass
     return None
 
 
-def resolve_company_ticker(row):
-    """Przetwarza wiersz z głównej tabeli, aby znaleźć ticker"""
-    try:
-        raw_name = str(row.iloc[0])
-        # Pobieramy 'slug' z nazwy (pierwsze słowo), aby znaleźć stronę z tickerem
-        slug = raw_name.split(" ")[0].strip()
+async def fetch_ticker_from_slug(fetcher, slug):
+    """Ticker ze strony szczegółów spółki albo None, gdy strona nie ma tickera GPW. Błędy sieci są przekazywane dalej"""
+    html = await fetcher.get_text(f"https://{BANKIER_HOST}/gielda/notowania/akcje/{slug}/podstawowe-dane")
+    if html is None:
+        return None
+    return await asyncio.to_thread(parse_ticker_page, html)
 
-        ticker = fetch_ticker_from_slug(slug)
 
-        if ticker:
-            return f"{ticker}.WA"
-    except Exception:
-        pass
-    return None
+def company_slug(row):
+    """Slug strony spółki - pierwsze słowo nazwy z głównej tabeli"""
+    return str(row.iloc[0]).split(" ")[0].strip()
+
+
+async def resolve_company_ticker(fetcher, slug):
+    ticker = await fetch_ticker_from_slug(fetcher, slug)
+    return f"{ticker}.WA" if ticker else None
+
+
+def load_slug_cache():
+    """slug -> {"ticker": "XXX.WA" albo None, "checked_at": timestamp}"""
+    if os.path.exists(SLUG_CACHE_FILE):
+        try:
+            with open(SLUG_CACHE_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Błąd cache slugów: {e}. Tworzę nowy.")
+    return {}
+
+
+def slug_needs_resolving(entry, now):
+    if entry is None:
+        return True
+    # Znaleziony ticker sie nie zmienia, brak tickera sprawdzamy co jakis czas
+    return entry["ticker"] is None and now - entry["checked_at"] > SLUG_NEGATIVE_RECHECK_DAYS * 86400
+
+
+async def scan_market(slug_cache, now):
+    """Lista spółek z bankier.pl i tickery slugów spoza cache; zwraca (slugi, wyniki lub wyjątki)"""
+    async with new_fetcher() as fetcher:
+        html = await fetcher.get_text(MARKET_LIST_URL, not_found_ok=False)
+        df_market = pd.read_html(io.StringIO(html))[0]
+
+        slugs = sorted({company_slug(row) for _, row in df_market.iterrows()})
+        to_resolve = [slug for slug in slugs if slug_needs_resolving(slug_cache.get(slug), now)]
+        logger.info(f"Spółek na liście: {len(slugs)}, znanych z cache slugów: {len(slugs) - len(to_resolve)}, "
+                    f"do sprawdzenia: {len(to_resolve)}")
+
+        results = await gather_with_progress([resolve_company_ticker(fetcher, slug) for slug in to_resolve],
+                                             "Postęp", every=100)
+        fetcher.log_summary()
+    return to_resolve, results
 
 
 def update_tickers():
@@ -200,30 +291,35 @@ def update_tickers():
         except Exception as e:
             logger.warning(f"Błąd cache: {e}. Tworzę nowy.")
 
-    url = "https://www.bankier.pl/gielda/notowania/akcje"
+    slug_cache = load_slug_cache()
+    cached_tickers.update(e["ticker"] for e in slug_cache.values() if e["ticker"])
+
+    now = time.time()
     try:
-        df_market = pd.read_html(url)[0]
+        to_resolve, results = asyncio.run(scan_market(slug_cache, now))
     except Exception as e:
         logger.error(f"Błąd pobierania strony głównej: {e}")
-        return list(cached_tickers)
-
-    logger.info(f"Skanowanie {len(df_market)} spółek w poszukiwaniu nowych tickerów...")
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=20) as executor:
-        futures = [executor.submit(resolve_company_ticker, row) for _, row in df_market.iterrows()]
-
-        completed = 0
-        new_found = 0
-        for future in concurrent.futures.as_completed(futures):
-            ticker = future.result()
-            completed += 1
-
-            if ticker and ticker not in cached_tickers:
-                cached_tickers.add(ticker)
-                new_found += 1
-
-            if completed % 100 == 0:
-                logger.info(f"Postęp: {completed}/{len(df_market)}")
+        return sorted(cached_tickers)
+
+    new_found = 0
+    failed = 0
+    for slug, ticker in zip(to_resolve, results):
+        if isinstance(ticker, Exception):
+            # Bez wpisu w cache - slug zostanie sprawdzony przy kolejnym uruchomieniu
+            logger.debug(f"Błąd pobierania tickera dla {slug}: {ticker}")
+            failed += 1
+            continue
+
+        slug_cache[slug] = {"ticker": ticker, "checked_at": now}
+        if ticker and ticker not in cached_tickers:
+            cached_tickers.add(ticker)
+            new_found += 1
+
+    if to_resolve:
+        with open(SLUG_CACHE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(slug_cache, f, indent=1, sort_keys=True)
+    if failed:
+        logger.warning(f"Nie udało się sprawdzić {failed} slugów - ponowna próba przy kolejnym uruchomieniu.")
 
     if new_found > 0:
         logger.info(f"Znaleziono {new_found} nowych spółek.")
@@ -236,188 +332,282 @@ def update_tickers():
     return sorted(list(cached_tickers))
 
 def fetch_financial_data(ticker):
-    try:
-        info = yf.Ticker(ticker).info
-
-        if 'shortName' not in info and 'symbol' not in info:
-            return None
-
-        pkd_id = YFINANCE_INDUSTRY_TO_PKD.get(info.get('industry', ''),
-                                              YFINANCE_SECTOR_FALLBACK.get(info.get('sector', ''), ""))
-
-        return {
-            'PKD_ID': pkd_id,
-            'Ticker': ticker,
-            'MarketCap': info.get('marketCap'),
-            'Revenue': info.get('totalRevenue'),
-            'PE_Trailing': info.get('trailingPE'),
-            'PB_Ratio': info.get('priceToBook'),
-            'ROE': info.get('returnOnEquity'),
-            'ProfitMargin': info.get('profitMargins'),
-            'DividendYield': info.get('dividendYield')
-        }
-    except Exception:
+    """None, gdy yfinance nie zna tickera; bledy sieci sa przekazywane dalej (ticker zostaje do ponownej proby)"""
+    info = yf.Ticker(ticker).info
+
+    if 'shortName' not in info and 'symbol' not in info:
         return None
 
+    pkd_id = YFINANCE_INDUSTRY_TO_PKD.get(info.get('industry', ''),
+                                          YFINANCE_SECTOR_FALLBACK.get(info.get('sector', ''), ""))
+
+    return {
+        'PKD_ID': pkd_id,
+        'Ticker': ticker,
+        'MarketCap': info.get('marketCap'),
+        'Revenue': info.get('totalRevenue'),
+        'PE_Trailing': info.get('trailingPE'),
+        'PB_Ratio': info.get('priceToBook'),
+        'ROE': info.get('returnOnEquity'),
+        'ProfitMargin': info.get('profitMargins'),
+        'DividendYield': info.get('dividendYield')
+    }
+
+
+class FundamentalsStore:
+    """Lokalna baza danych fundamentalnych: wartosc i czas pobrania kazdego pola osobno"""
+
+    def __init__(self, path=FUNDAMENTALS_DB):
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS fundamentals (
+                ticker     TEXT NOT NULL,
+                field      TEXT NOT NULL,
+                value,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (ticker, field)
+            );
+            CREATE TABLE IF NOT EXISTS missing_tickers (
+                ticker     TEXT PRIMARY KEY,
+                checked_at REAL NOT NULL
+            );
+        """)
+
+    def close(self):
+        self.conn.close()
+
+    def stale_tickers(self, tickers, now=None):
+        """Tickery nowe, z nieaktualnym polem albo dawno nie sprawdzane (brak danych)"""
+        now = now or time.time()
+        fetched = {}
+        for ticker, field, fetched_at in self.conn.execute("SELECT ticker, field, fetched_at FROM fundamentals"):
+            fetched.setdefault(ticker, {})[field] = fetched_at
+        missing = dict(self.conn.execute("SELECT ticker, checked_at FROM missing_tickers"))
+
+        stale = []
+        for ticker in tickers:
+            if ticker in missing:
+                if now - missing[ticker] > MISSING_RECHECK_DAYS * 86400:
+                    stale.append(ticker)
+                continue
+            fields = fetched.get(ticker, {})
+            if any(field not in fields or now - fields[field] > max_age * 86400
+                   for field, max_age in FIELD_MAX_AGE_DAYS.items()):
+                stale.append(ticker)
+        return stale
+
+    def save(self, ticker, data, now=None):
+        now = now or time.time()
+        with self.conn:
+            self.conn.execute("DELETE FROM missing_tickers WHERE ticker = ?", (ticker,))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO fundamentals (ticker, field, value, fetched_at) VALUES (?, ?, ?, ?)",
+                [(ticker, field, data.get(field), now) for field in FIELD_MAX_AGE_DAYS]
+            )
+
+    def mark_missing(self, ticker, now=None):
+        """Spolka bez danych w yfinance nie jest dluzej liczona do raportu"""
+        with self.conn:
+            self.conn.execute("DELETE FROM fundamentals WHERE ticker = ?", (ticker,))
+            self.conn.execute("INSERT OR REPLACE INTO missing_tickers (ticker, checked_at) VALUES (?, ?)",
+                              (ticker, now or time.time()))
+
+    def load(self, tickers):
+        """Zapisane dane podanych tickerow w formacie zwracanym przez fetch_financial_data"""
+        wanted = set(tickers)
+        rows = {}
+        for ticker, field, value in self.conn.execute("SELECT ticker, field, value FROM fundamentals"):
+            if ticker in wanted:
+                rows.setdefault(ticker, {'Ticker': ticker})[field] = value
+        return [rows[t] for t in sorted(rows)]
+
+
+async def fetch_fundamentals(tickers):
+    async with new_fetcher() as fetcher:
+        results = await gather_with_progress(
+            [fetcher.call_blocking(YAHOO_HOST, fetch_financial_data, t) for t in tickers], "Pobrano dane", every=50
+        )
+        fetcher.log_summary()
+    return results
+
 
 def process_market_data(tickers):
     logger.info("--- KROK 2: ANALIZA FINANSOWA ---")
-    financial_data = []
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-        future_to_ticker = {executor.submit(fetch_financial_data, t): t for t in tickers}
-
-        completed = 0
-        for future in concurrent.futures.as_completed(future_to_ticker):
-            res = future.result()
-            completed += 1
-            if completed % 50 == 0:
-                logger.info(f"Pobrano dane: {completed}/{len(tickers)}")
-            if res:
-                financial_data.append(res)
+    store = FundamentalsStore()
+    try:
+        stale = store.stale_tickers(tickers)
+        logger.info(f"Pominięto pobieranie {len(tickers) - len(stale)}/{len(tickers)} tickerów (aktualne dane w {FUNDAMENTALS_DB}). "
+                    f"Do pobrania: {len(stale)}.")
+
+        results = asyncio.run(fetch_fundamentals(stale)) if stale else []
+
+        fetched, missing, failed = 0, 0, 0
+        for ticker, res in zip(stale, results):
+            if isinstance(res, Exception):
+                # Zostaja poprzednio zapisane dane (jesli sa), kolejne uruchomienie sprobuje ponownie
+                logger.debug(f"Błąd pobierania {ticker}: {res}")
+                failed += 1
+            elif res:
+                store.save(ticker, res)
+                fetched += 1
+            else:
+                store.mark_missing(ticker)
+                missing += 1
+
+        logger.info(f"Pobrano {fetched}, bez danych {missing}, błędy {failed}, "
+                    f"pominięte (dane z bazy lokalnej) {len(tickers) - len(stale)}.")
+        financial_data = store.load(tickers)
+    finally:
+        store.close()
 
     return pd.DataFrame(financial_data)
 
 
-def generate_report(df):
+@dataclasses.dataclass(frozen=True)
+class SectorScoring:
+    """Progi i wagi algorytmu ratingu (opis w README). Domyslne wartosci = DEFAULT_SCORING"""
+    min_companies: int = 3
+    # (prog nasycenia, liczba punktow) - liniowo od 0 do progu
+    margin: tuple = (0.15, 25)
+    roe: tuple = (0.12, 15)
+    scale: tuple = (10, 10)
+    dividend: tuple = (0.04, 20)
+    # P/E: (od, do, punkty) wlacznie z granicami - pierwszy pasujacy przedzial, poza nimi 0 pkt
+    pe_bands: tuple = ((5, 25, 30), (25, 40, 10))
+    max_score: int = 100
+    # (minimalny wynik, rating) od najwyzszego; ponizej ostatniego progu default_rating
+    ratings: tuple = ((80, "A (Strong)"), (60, "B (Stable)"), (40, "C (Weak)"))
+    default_rating: str = "D (Speculative)"
+
+
+DEFAULT_SCORING = SectorScoring()
+
+NUMERIC_COLUMNS = ['MarketCap', 'Revenue', 'PE_Trailing', 'PB_Ratio', 'ROE', 'ProfitMargin', 'DividendYield']
+
+
+def aggregate_sectors(df):
+    """Mediany wskaznikow, liczba i kapitalizacja spolek w kazdej sekcji PKD (wbudowane agregacje pandas)"""
+    df = df.assign(**{c: pd.to_numeric(df[c], errors='coerce') for c in NUMERIC_COLUMNS})
+    return df.groupby('PKD_ID').agg(
+        total_cap=('MarketCap', 'sum'),
+        companies=('MarketCap', 'count'),
+        margin=('ProfitMargin', 'median'),
+        roe=('ROE', 'median'),
+        pe=('PE_Trailing', 'median'),
+        dividend=('DividendYield', 'median'),
+    )
+
+
+def saturating_points(values, cap, points):
+    """0 pkt dla wartosci <= 0 (i brakow), liniowo do points przy cap, dalej points"""
+    return np.clip(np.nan_to_num(values, nan=0.0) / cap, 0.0, 1.0) * points
+
+
+def score_sectors(agg, scoring=DEFAULT_SCORING):
+    """Punkty czastkowe, wynik i rating dla wszystkich sekcji naraz; agg z aggregate_sectors"""
+    agg = agg[agg['companies'] >= scoring.min_companies]
+    pe = agg['pe'].to_numpy(dtype=float)
+
+    # np.select bierze pierwszy spelniony warunek, wiec wspolna granica (25) nalezy do pierwszego przedzialu
+    pe_conditions = [(pe >= low) & (pe <= high) for low, high, _ in scoring.pe_bands]
+    subscores = {
+        's_margin': saturating_points(agg['margin'].to_numpy(dtype=float), *scoring.margin),
+        's_roe': saturating_points(agg['roe'].to_numpy(dtype=float), *scoring.roe),
+        's_scale': saturating_points(agg['companies'].to_numpy(dtype=float), *scoring.scale),
+        's_div': saturating_points(agg['dividend'].to_numpy(dtype=float), *scoring.dividend),
+        's_pe': np.select(pe_conditions, [points for _, _, points in scoring.pe_bands], default=0),
+    }
+
+    final = np.minimum(scoring.max_score, sum(subscores.values()))
+    thresholds = [final >= minimum for minimum, _ in scoring.ratings]
+    rating = np.select(thresholds, [name for _, name in scoring.ratings], default=scoring.default_rating)
+    # Jeden concat zamiast assign kolumna po kolumnie - liczy sie przy wielu zestawach parametrow
+    return pd.concat([agg, pd.DataFrame({**subscores, 'final_score': final, 'rating': rating}, index=agg.index)], axis=1)
+
+
+def generate_report(df, scoring=DEFAULT_SCORING):
     logger.info("--- KROK 3: OBLICZANIE WSKAŹNIKÓW ---")
-    cols = ['MarketCap', 'Revenue', 'PE_Trailing', 'PB_Ratio', 'ROE', 'ProfitMargin', 'DividendYield']
-    for c in cols: df[c] = pd.to_numeric(df[c], errors='coerce')
-
-    def get_median(x):
-        return x.median()
-
-    def get_sum(x):
-        return x.sum()
-
-    def get_count(x):
-        return x.count()
-
-    agg = df.groupby('PKD_ID').agg({
-        'MarketCap': [get_sum, get_count],
-        'Revenue': get_sum,
-        'PE_Trailing': get_median,
-        'ROE': get_median,
-        'ProfitMargin': get_median,
-        'DividendYield': get_median
+    if df.empty:
+        return []
+
+    scored = score_sectors(aggregate_sectors(df), scoring)
+    medians = scored[['margin', 'roe', 'pe', 'dividend']].fillna(0.0)
+
+    report = pd.DataFrame({
+        "section_code": scored.index,  # To pole jest kluczowe dla bazy danych
+        "section_name": [PKD_DESCRIPTIONS.get(pkd, pkd)[:20] for pkd in scored.index],
+        "safety_score": scored['final_score'].astype(int).to_numpy(),
+        "rating": scored['rating'].str[:20].to_numpy(),
+        "median_margin": medians['margin'].to_numpy(),
+        "median_roe": medians['roe'].to_numpy(),
+        "median_pe": medians['pe'].to_numpy(),
+        "median_dividend_yield": medians['dividend'].to_numpy(),
+        "companies_count": scored['companies'].to_numpy(),
+        "total_cap_pln": scored['total_cap'].fillna(0).astype('int64').to_numpy(),
     })
+    # to_dict zwraca typy Pythona (nie numpy) - potrzebne dla json.dump i psycopg2
+    return report.to_dict(orient='records')
+
 
-    agg.columns = ['_'.join(c).strip() for c in agg.columns.values]
-
-    # WAŻNE: Tu musi być LISTA, nie słownik
-    report_list = []
-
-    for pkd, row in agg.iterrows():
-        if row['MarketCap_get_count'] < 3: continue
-
-        margin = row.get('ProfitMargin_get_median', 0)
-        roe = row.get('ROE_get_median', 0)
-        div = row.get('DividendYield_get_median', 0)
-        pe = row.get('PE_Trailing_get_median', 0)
-
-        # Scoring
-        s_margin = min((max(0, margin) / 0.15), 1.0) * 25
-        s_roe = min((max(0, roe) / 0.12), 1.0) * 15
-        s_scale = min(row['MarketCap_get_count'] / 10, 1.0) * 10
-        s_div = min((div / 0.04), 1.0) * 20
-        if 5 <= pe <= 25:
-            s_pe = 30
-        elif 25 < pe <= 40:
-            s_pe = 10
-        else:
-            s_pe = 0
-
-        final_score = min(100, s_margin + s_roe + s_scale + s_div + s_pe)
-
-        if final_score >= 80:
-            rating = "A (Strong)"
-        elif final_score >= 60:
-            rating = "B (Stable)"
-        elif final_score >= 40:
-            rating = "C (Weak)"
-        else:
-            rating = "D (Speculative)"
-
-        def clean_decimal(v):
-            if pd.isna(v) or v is None: return 0.0
-            return float(v)
-
-        def clean_int(v):
-            if pd.isna(v) or v is None: return 0
-            return int(v)
-
-        # Tworzymy obiekt sekcji
-        section_data = {
-            "section_code": pkd,  # To pole jest kluczowe dla bazy danych
-            "section_name": PKD_DESCRIPTIONS.get(pkd, pkd)[:20],
-            "safety_score": int(final_score),
-            "rating": rating[:20],
-            "median_margin": clean_decimal(margin),
-            "median_roe": clean_decimal(roe),
-            "median_pe": clean_decimal(pe),
-            "median_dividend_yield": clean_decimal(div),
-            "companies_count": clean_int(row['MarketCap_get_count']),
-            "total_cap_pln": clean_int(row['MarketCap_get_sum'])
-        }
-
-        # Dodajemy do LISTY
-        report_list.append(section_data)
-
-    return report_list
+SECTION_COLUMNS = ['section_code', 'section_name', 'safety_score', 'rating', 'median_margin', 'median_roe',
+                   'median_pe', 'median_dividend_yield', 'companies_count', 'total_cap_pln']
 
 
 def save_to_database(report_data):
+    """
+    Raport z dzisiejsza data i jego sekcje w jednej transakcji. Id nadaja sekwencje (migracja 0008),
+    a ponowne uruchomienie tego samego dnia nadpisuje raport zamiast tworzyc kolejny.
+    Id zostaja te same, wiec o zmianie danych backend dowiaduje sie z licznika data_version
+    (migracja 0010), ktory trigger zwieksza przy kazdym INSERT/UPDATE/DELETE na report i section.
+    """
     logger.info("--- KROK 4: ZAPIS DO BAZY DANYCH ---")
+    if not report_data:
+        # Pusty raport skasowalby dzisiejsze sekcje z poprzedniego uruchomienia
+        logger.warning("Brak sekcji do zapisania - pomijam zapis do bazy.")
+        return
+
+    today = datetime.datetime.now().date()
+    values = [tuple(section[c] for c in SECTION_COLUMNS) for section in report_data]
+    codes = [section['section_code'] for section in report_data]
 
     conn = None
     try:
         conn = psycopg2.connect(**DB_CONFIG)
-        cur = conn.cursor()
-
-        cur.execute("SELECT MAX(Id) FROM Report;")
-        max_id = cur.fetchone()[0]
-        new_report_id = 1 if max_id is None else max_id + 1
-
-        today = datetime.datetime.now().date()
-
-        insert_report_query = "INSERT INTO Report (Id, date) VALUES (%s, %s);"
-        cur.execute(insert_report_query, (new_report_id, today))
-        logger.info(f"Utworzono Raport ID: {new_report_id}")
-
-        insert_section_query = """
-                               INSERT INTO Section (Id, Report_Id, Section_code, Section_name, Safety_score, Rating, \
-                                                    Median_margin, Median_roe, Median_pe, Median_divident_yield, \
-                                                    Companies_count, total_cap_pln) \
-                               VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s); \
-                               """
-
-        cur.execute("SELECT MAX(Id) FROM Section;")
-        max_sec_id = cur.fetchone()[0]
-        current_sec_id = 1 if max_sec_id is None else max_sec_id + 1
-
-        for section in report_data:
-            cur.execute(insert_section_query, (
-                current_sec_id,
-                new_report_id,
-                section['section_code'],
-                section['section_name'],
-                section['safety_score'],
-                section['rating'],
-                section['median_margin'],
-                section['median_roe'],
-                section['median_pe'],
-                section['median_dividend_yield'],
-                section['companies_count'],
-                section['total_cap_pln']
-            ))
-            current_sec_id += 1
-
-        conn.commit()
-        logger.info(f"Zapisano {len(report_data)} sekcji do bazy.")
+        with conn, conn.cursor() as cur:
+            # DO UPDATE (a nie DO NOTHING), zeby RETURNING zwrocil id istniejacego raportu
+            cur.execute("""
+                        INSERT INTO Report (date) VALUES (%s)
+                        ON CONFLICT (date) DO UPDATE SET date = EXCLUDED.date
+                        RETURNING Id;
+                        """, (today,))
+            report_id = cur.fetchone()[0]
+            rows = [(report_id, *v) for v in values]
+
+            execute_values(cur, """
+                           INSERT INTO Section (Report_Id, Section_code, Section_name, Safety_score, Rating,
+                                                Median_margin, Median_roe, Median_pe, Median_divident_yield,
+                                                Companies_count, total_cap_pln)
+                           VALUES %s
+                           ON CONFLICT (Report_Id, Section_code) DO UPDATE SET
+                               Section_name = EXCLUDED.Section_name,
+                               Safety_score = EXCLUDED.Safety_score,
+                               Rating = EXCLUDED.Rating,
+                               Median_margin = EXCLUDED.Median_margin,
+                               Median_roe = EXCLUDED.Median_roe,
+                               Median_pe = EXCLUDED.Median_pe,
+                               Median_divident_yield = EXCLUDED.Median_divident_yield,
+                               Companies_count = EXCLUDED.Companies_count,
+                               total_cap_pln = EXCLUDED.total_cap_pln;
+                           """, rows)
+
+            # Sekcje z wczesniejszego uruchomienia, ktorych nie ma juz w raporcie (np. mniej niz 3 spolki)
+            cur.execute("DELETE FROM Section WHERE Report_Id = %s AND Section_code <> ALL(%s);", (report_id, codes))
+            removed = cur.rowcount
+
+        logger.info(f"Zapisano raport ID {report_id} ({today}): {len(rows)} sekcji, usunięto nieaktualnych: {removed}.")
 
     except Exception as e:
         logger.error(f"Błąd bazy danych: {e}")
-        if conn: conn.rollback()
     finally:
         if conn: conn.close()
 
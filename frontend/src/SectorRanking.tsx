@@ -12,6 +12,29 @@ export interface SectorRankingItem {
   final_score: number;
 }
 
+// Zdarzenie "diff" z /scores/stream: tylko zmienione pola zmienionych sekcji
+interface ScoresDiff {
+  changed: (Partial<SectorRankingItem> & { section_code: string })[];
+  removed: string[];
+}
+
+const sortByScore = (items: SectorRankingItem[]) =>
+  [...items].sort((a, b) => b.final_score - a.final_score);
+
+const applyDiff = (current: SectorRankingItem[], diff: ScoresDiff) => {
+  const bySection = new Map(current.map((item) => [item.section_code, item]));
+  diff.removed.forEach((code) => bySection.delete(code));
+  diff.changed.forEach((change) => {
+    const merged = { ...bySection.get(change.section_code), ...change } as SectorRankingItem;
+    if (merged.section_name === "Pozostałe") {
+      bySection.delete(change.section_code);
+    } else {
+      bySection.set(change.section_code, merged);
+    }
+  });
+  return sortByScore(Array.from(bySection.values()));
+};
+
 const SectorRanking = () => {
   const [sectors, setSectors] = useState<SectorRankingItem[]>([]);
   const [loading, setLoading] = useState<boolean>(true);
@@ -44,6 +67,24 @@ const SectorRanking = () => {
     };
 
     fetchData();
+
+    // Zmiany wyników przychodzą z serwera (SSE) - bez ponownego odpytywania /scores
+    const source = new EventSource(`${API_BASE_URL}/scores/stream`);
+
+    source.addEventListener('snapshot', (event) => {
+      const data: SectorRankingItem[] = JSON.parse((event as MessageEvent).data);
+      // Pusty snapshot (serwer nie wczytał jeszcze wyników) nie może skasować rankingu z /scores
+      if (data.length === 0) return;
+      setSectors(sortByScore(data.filter((item) => item.section_name !== "Pozostałe")));
+      setLoading(false);
+    });
+
+    source.addEventListener('diff', (event) => {
+      const diff: ScoresDiff = JSON.parse((event as MessageEvent).data);
+      setSectors((current) => applyDiff(current, diff));
+    });
+
+    return () => source.close();
   }, []);
 
   if (loading) return <div className="p-8 text-center text-slate-500">Ładowanie rankingu...</div>;
@@ -13,6 +13,9 @@ import { Sector } from '../types';
 
 import { API_BASE_URL } from '../config';
 
+// Więcej punktów i tak nie zmieści się na szerokość wykresu - serwer przerzedza serie (LTTB)
+const MAX_CHART_POINTS = 200;
+
 interface ChartsTabProps {
     sector: Sector;
 }
@@ -38,7 +41,7 @@ export default function ChartsTab({ sector }: ChartsTabProps) {
 
     useEffect(() => {
         setLoading(true);
-        fetch(`${API_BASE_URL}/charts/history/${sector}?days=${days}`)
+        fetch(`${API_BASE_URL}/charts/history/${sector}?days=${days}&max_points=${MAX_CHART_POINTS}`)
             .then(res => {
                 if (!res.ok) throw new Error("Failed to fetch history");
                 return res.json();